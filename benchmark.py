@@ -0,0 +1,279 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import argparse
+import os
+import sys
+from multiprocessing import Pool
+import matplotlib as mpl
+import numpy as np
+from config import config
+from dynopy.motion_planning.planning_limit import PlanningLimit
+from dynopy.tools.initialize import load_parameter_file
+from dynopy.tools.monte_carlo import LockStepSimulation, load_scenario
+from dynopy.tools.results import ParameterSets, ResultsWriter
+import single_simulation
+
+
+def main(argv=None):
+    """
+    runs a benchmark sweep from the command line without any prompts or figures, ie
+
+        python benchmark.py workspace_sandbox.txt parameters_benchmark.txt --planner irrt --seed 7 --workers 8
+
+    The volunteer plans for t_limit seconds of cpu time each step unless --limit-type or the parameter file's
+    limit_type and n_limit columns pick a count based limit, only those make a seeded sweep reproducible, ie
+
+        python benchmark.py workspace_sandbox.txt parameters_benchmark.txt -s 7 --limit-type expansions --n-limit 200
+
+    --engine lockstep leaves the volunteer out and steps the dedicated agents of all runs of a parameter set together,
+    see run_lockstep.
+
+    :param argv: list of command line arguments, defaults to sys.argv
+    :return: exit status, 0 if every run finished
+    """
+    parser = argparse.ArgumentParser(description="Run a benchmark sweep headless.")
+    parser.add_argument("workspace", help="workspace file, relative to settings/")
+    parser.add_argument("params", help="parameter file, relative to settings/")
+    parser.add_argument("-p", "--planner", choices=("rig", "irrt"), default="rig", help="volunteer planner")
+    parser.add_argument("-e", "--engine", choices=("agents", "lockstep"), default="agents",
+                        help="'agents' simulates the volunteer and the dedicated agents, 'lockstep' only the dedicated "
+                             "agents with every run of a parameter set as a replica of one LockStepSimulation")
+    parser.add_argument("-s", "--seed", type=int, default=None,
+                        help="sweep seed, every run's seed is spawned from it. Runs only repeat exactly with a count "
+                             "based --limit-type")
+    parser.add_argument("-l", "--limit-type", choices=tuple(PlanningLimit.TYPES), default=None,
+                        help="how the volunteer's planning is limited each step, for parameter sets without a "
+                             "limit_type column. Defaults to the volunteer's configuration")
+    parser.add_argument("-n", "--n-limit", type=int, default=None,
+                        help="expansions or nodes per step of the count based limit types, for parameter sets without "
+                             "an n_limit column. Defaults to the volunteer's configuration")
+    parser.add_argument("-o", "--output", default=None,
+                        help="results file, defaults to results/<workspace>[_irrt|_lockstep]_results.txt, .sqlite or "
+                             ".db writes SQLite. The parameter sets are written next to it.")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes, defaults to every core")
+    parser.add_argument("-q", "--quiet", action="store_true", help="don't print progress")
+    args = parser.parse_args(argv)
+
+    mpl.use('agg')
+    base_folder = os.path.dirname(os.path.abspath(__file__))
+    irrt = args.planner == "irrt"
+    lockstep = args.engine == "lockstep"
+
+    for filename in (args.workspace, args.params):
+        if not os.path.isfile(os.path.join(base_folder, 'settings', filename)):
+            print("ERROR: settings file '{}' not found".format(filename), file=sys.stderr)
+            return 1
+
+    params_list = load_parameter_file(args.params, base_folder)
+    if not params_list:
+        print("ERROR: no parameter sets in '{}'".format(args.params), file=sys.stderr)
+        return 1
+
+    if args.n_limit is not None and args.n_limit < 1:
+        print("ERROR: --n-limit must be at least 1", file=sys.stderr)
+        return 1
+
+    if not lockstep:
+        set_planning_limit(params_list, args.limit_type, args.n_limit)
+
+    results_file = args.output
+    if results_file is None:
+        name = os.path.splitext(os.path.basename(args.workspace))[0]
+        suffix = '_lockstep' if lockstep else '_irrt' if irrt else ''
+        results_file = os.path.join(base_folder, 'results', name + suffix + '_results.txt')
+
+    params_file = get_parameter_sets_file(results_file)
+
+    if os.path.dirname(results_file):
+        os.makedirs(os.path.dirname(results_file), exist_ok=True)
+
+    if lockstep:
+        run_lockstep(args.workspace, params_list, results_file, params_file, not args.quiet)
+    else:
+        run_benchmark(args.workspace, params_list, irrt, results_file, params_file, args.workers, args.seed,
+                      not args.quiet)
+
+    if not args.quiet:
+        print(" Results written to {}".format(results_file))
+
+    return 0
+
+
+def run_benchmark(filename_ws, params_list, irrt, results_file, params_file, n_workers=None, seed=None, verbose=True):
+    """
+    gives each parameter set its id in the parameter sets file, writing any new ones, then sweeps them and appends
+    every run's results to the results file. Results ending in .sqlite, .sqlite3 or .db go to SQLite, see
+    ResultsWriter.
+
+    :param filename_ws: string for the workspace parameters filename
+    :param params_list: list of parameter dictionaries, see load_parameter_file
+    :param irrt: run volunteer with IRRT algorithm
+    :param results_file: path of the results file
+    :param params_file: path of the parameter sets file
+    :param n_workers: number of worker processes, see sweep
+    :param seed: sweep seed, see sweep
+    :param verbose: print progress
+    :return:
+    """
+    n_params = len(params_list)
+
+    with ParameterSets(params_file) as param_sets:
+        for params in params_list:
+            param_sets.identify(params)
+
+    with ResultsWriter(results_file) as writer:
+        for p, params, r, results in sweep(filename_ws, params_list, irrt, n_workers, seed):
+            if verbose:
+                runs = params.get("n_runs")
+                print(" Parameter Set: {} of {}\t\tRun: {} of {} ".format(p + 1, n_params, r + 1, runs), end='\r')
+
+            results.update({"param_set": params.get("param_set"), "run": r})
+            writer.write(results)
+
+    if verbose:
+        print()
+
+
+def run_lockstep(filename_ws, params_list, results_file, params_file, verbose=True):
+    """
+    runs only the dedicated agents of each parameter set for budget steps, with its n_runs runs stepped together as
+    the replicas of one LockStepSimulation, and appends every run's results to the results file. Each result holds the
+    information every agent gained, "<agent>_Gained". The volunteer parameters (lambda, t_limit, gamma) aren't used.
+
+    :param filename_ws: string for the workspace parameters filename
+    :param params_list: list of parameter dictionaries, see load_parameter_file
+    :param results_file: path of the results file
+    :param params_file: path of the parameter sets file
+    :param verbose: print progress
+    :return:
+    """
+    base_folder = os.path.dirname(os.path.abspath(__file__))
+    n_params = len(params_list)
+
+    with ParameterSets(params_file) as param_sets:
+        for params in params_list:
+            param_sets.identify(params)
+
+    with ResultsWriter(results_file) as writer:
+        for p, params in enumerate(params_list):
+            if verbose:
+                print(" Parameter Set: {} of {} ".format(p + 1, n_params), end='\r')
+
+            budget = params.get("budget")
+            pdf, paths, p_d, names = load_scenario(filename_ws, params.get("n_agents"), budget, config, base_folder)
+            sim = LockStepSimulation(pdf, paths, p_d, params.get("n_runs"))
+
+            for r, i_gained in enumerate(sim.run(budget).tolist()):
+                results = {name + "_Gained": i for name, i in zip(names, i_gained)}
+                results.update({"param_set": params.get("param_set"), "run": r})
+                writer.write(results)
+
+    if verbose:
+        print()
+
+
+def set_planning_limit(params_list, limit_type=None, n_limit=None):
+    """
+    fills in the planning limit of the parameter sets that don't set their own. The limit becomes part of each
+    parameter set, so runs with different limits get their own param_set.
+    :param params_list: list of parameter dictionaries, see load_parameter_file
+    :param limit_type: how the volunteer's planning is limited each step, see PlanningLimit. None leaves it out
+    :param n_limit: expansions or nodes per step of the count based limit types, None leaves it out
+    :return:
+    """
+    for params in params_list:
+        if limit_type is not None:
+            params.setdefault("limit_type", limit_type)
+
+        if n_limit is not None:
+            params.setdefault("n_limit", n_limit)
+
+
+def get_parameter_sets_file(results_file):
+    """
+
+    :param results_file: path of a results file, ie results/sandbox_results.txt
+    :return: path of the matching parameter sets file, ie results/sandbox_parameter_sets.txt
+    """
+    root, ext = os.path.splitext(results_file)
+
+    if root.endswith("_results"):
+        root = root[:-len("_results")]
+
+    if ext.lower() not in (".txt", ".csv"):
+        ext = ".txt"        # parameter sets are always CSV
+
+    return root + "_parameter_sets" + ext
+
+
+def sweep(filename_ws, params_list, irrt=False, n_workers=None, seed=None):
+    """
+    runs every parameter set n_runs times, fanned out over a pool of worker processes. Each run gets its own seed
+    spawned from the sweep seed. With a count based limit_type, "expansions" or "nodes", the same sweep seed and
+    parameter list give the same results regardless of the number of workers. The time based limits plan for as long
+    as the clock allows, so their results also depend on the machine and its load.
+
+    :param filename_ws: string for the workspace parameters filename
+    :param params_list: list of parameter dictionaries, see load_parameter_file
+    :param irrt: run volunteer with IRRT algorithm
+    :param n_workers: number of worker processes, defaults to the number of cores. 1 runs in this process.
+    :param seed: int the run seeds are spawned from, None for a fresh seed
+    :return: generator of (parameter list index, params, run, results) in the order of the parameter list then run,
+    yielded as each run finishes
+    """
+    jobs = []
+    indices = []        # position in params_list of each job's parameters
+    for p, params in enumerate(params_list):
+        for r in range(0, params.get("n_runs")):
+            jobs.append((filename_ws, params, r, irrt))
+            indices.append(p)
+
+    seeds = np.random.SeedSequence(seed).spawn(len(jobs))
+    jobs = [job + (seed_job,) for job, seed_job in zip(jobs, seeds)]
+
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+
+    if n_workers <= 1 or len(jobs) <= 1:
+        for p, job in zip(indices, jobs):
+            yield p, job[1], job[2], run_job(job)
+
+        return
+
+    with Pool(min(n_workers, len(jobs)), initializer=initialize_worker) as pool:
+        for p, job, results in zip(indices, jobs, pool.imap(run_job, jobs)):
+            yield p, job[1], job[2], results
+
+
+def initialize_worker():
+    # workers never show a figure
+    mpl.use('agg')
+
+
+def run_job(job):
+    """
+
+    :param job: tuple of workspace filename, parameters, run number, irrt flag and the run's SeedSequence
+    :return: dictionary of final results
+    """
+    filename_ws, params, _, irrt, seed = job
+
+    return single_simulation.run(
+        filename_ws,
+        params.get("lambda"),
+        params.get("budget"),
+        params.get("t_limit"),
+        params.get("gamma"),
+        params.get("n_agents"),
+        irrt,
+        False,
+        False,
+        seed,
+        params.get("limit_type"),
+        params.get("n_limit")
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -35,6 +35,8 @@ def load_agent_parameters(name):
             "step_size": 1,         # distance traveled each time step
             "radius": 1.9,          # radius to search for node expansion in
             "t_limit": .1,           # expansion time limit
+            "limit_type": "cpu",    # what limits expansion, "cpu" or "wall" time, or "expansions" or "nodes" count
+            "n_limit": 100,         # expansion or node count limit for the count based limit types
             "gamma": 1,        # reward discount factor
             "samples": 16,          # number of control inputs to sample
             "p_d": 0.80,          # chance of detection if target is in cell
@@ -42,7 +44,12 @@ def load_agent_parameters(name):
             "home": (10.5, 10.5),   # charging station position
             "fusion_range": 2,       # max distance agent can communicate
             "dynamics_range": ([-1, 1], [1, 1],),
-            "epsilon": .25            # min distance between children
+            "epsilon": .25,            # min distance between children
+            "spatial_index": "grid",    # nearest node search structure, "grid" or "linear"
+            "sampler": "uniform",       # expansion sampling, "uniform" over the workspace or weighted by the "pdf"
+            "fusion_rule": "min",       # pdf fusion rule, "min", "product" or "ci"
+            "fusion_weight": None,      # weight of own pdf for "ci" fusion, None splits evenly
+            "fusion_delta": False,      # only exchange cells changed since the last fusion, "min" rule only
         }
 
     elif name == "Pinky":
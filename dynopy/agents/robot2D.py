@@ -22,9 +22,13 @@ class Robot2D:
         # self._pD = 1 - self.pD      # probability of no detection
         self.cfg = load_agent_parameters(name)
 
-        self.pdf = None  # current probability distribution
+        self.pdf = None             # current probability distribution, as unnormalized mass, see get_pdf()
+        self.pdf_total = None       # sum of the mass in self.pdf, None until the first write
+        self.pdf_scale = 1.0        # mass / pdf_scale = probability
+        self.dirty_cells = {}       # channel: set of (row, col) cells changed since the last fusion over the channel
         self.workspace = None       # current workspace
         self.c_space = None
+        self.rng = np.random.default_rng()     # random stream for sampling, seeded per simulation with set_rng()
 
         self.waypoints = []         # list of points the agent needs to reach
         self.path = []              # list of 2D positions
@@ -62,10 +66,11 @@ class Robot2D:
             plt.plot(x, y, '.', color=self.cfg["color"])
 
     def plot_pdf(self):
-        rows, cols = self.pdf.shape
+        pdf = self.get_pdf()
+        rows, cols = pdf.shape
         for x in range(0, cols):
             for y in range(0, rows):
-                size = self.pdf[y][x]*300
+                size = pdf[y][x]*300
                 plt.plot(x + 0.5, y + 0.5, color='white', marker='o', markersize=size)
 
     def get_name(self):
@@ -83,6 +88,20 @@ class Robot2D:
     def get_position(self):
         return self.state.get_position()
 
+    def get_rng(self):
+        return self.rng
+
+    def set_rng(self, rng):
+        """
+
+        :param rng: numpy Generator, or a seed or SeedSequence to make one from
+        :return:
+        """
+        if not isinstance(rng, np.random.Generator):
+            rng = np.random.default_rng(rng)
+
+        self.rng = rng
+
     def get_path(self):
         return self.path
 
@@ -90,13 +109,24 @@ class Robot2D:
         self.workspace = ws
 
     def initialize_pdf(self):
-        self.pdf = self.workspace.pdf.copy()
+        self.set_pdf(self.workspace.pdf.copy())
 
     def get_pdf(self):
+        """
+        writes only update the mass of a single cell, the whole grid is normalized here when it's needed
+        :return: normalized pdf
+        """
+        if self.pdf_scale != 1.0:
+            self.pdf = self.pdf / self.pdf_scale
+            self.pdf_total = self.pdf_total / self.pdf_scale
+            self.pdf_scale = 1.0
+
         return self.pdf
 
     def set_pdf(self, pdf):
         self.pdf = pdf
+        self.pdf_total = None
+        self.pdf_scale = 1.0
 
     def set_c_space(self):
         c1 = self.workspace.get_x_bounds()
@@ -144,7 +174,7 @@ class Robot2D:
         y = trunc(y)
 
         try:
-            info = self.pdf[y][x]
+            info = self.pdf[y][x] / self.pdf_scale
         except IndexError:
             info = 0
 
@@ -166,10 +196,85 @@ class Robot2D:
         y = trunc(y)
 
         try:
-            self.pdf[y][x] = value
-            self.pdf = self.pdf / np.sum(self.pdf)  # normalize
+            mass_old = self.pdf[y][x]
         except IndexError:
-            pass
+            return
+
+        if self.pdf_total is None:
+            self.pdf_total = np.sum(self.pdf)
+
+        mass_new = value*self.pdf_scale
+        self.pdf[y][x] = mass_new
+        self.pdf_total += mass_new - mass_old
+        self.pdf_scale = self.pdf_total     # normalize
+
+        rows, cols = self.pdf.shape
+        self.mark_dirty([(y % rows, x % cols)])
+
+    def track_channel(self, channel):
+        """
+        starts recording the cells this agent changes, so the next fusion over the channel can exchange only those
+        :param channel: name of the agent on the other end
+        :return:
+        """
+        self.dirty_cells.setdefault(channel, set())
+
+    def get_dirty_cells(self, channel):
+        return self.dirty_cells.get(channel, set())
+
+    def clear_dirty_cells(self, channel):
+        if channel in self.dirty_cells:
+            self.dirty_cells[channel] = set()
+
+    def mark_dirty(self, cells, skip=None):
+        """
+
+        :param cells: list of (row, col) cells that changed
+        :param skip: channel the change came from, it isn't marked
+        :return:
+        """
+        for channel, dirty in self.dirty_cells.items():
+            if channel != skip:
+                dirty.update(cells)
+
+    def get_cell_values(self, rows, cols):
+        """
+
+        :param rows: array of row indexes
+        :param cols: array of column indexes
+        :return: array of the normalized pdf values of the cells
+        """
+        return self.pdf[rows, cols] / self.pdf_scale
+
+    def fuse_cells(self, cells, agent, channel):
+        """
+        min fusion limited to the cells that changed on either side since the last exchange. Works on the mass so
+        the normalizer is only adjusted by the cells that change.
+        :param cells: set of (row, col) cells to exchange
+        :param agent: Robot2D to fuse with
+        :param channel: name of the agent
+        :return: list of (row, col) cells whose value changed
+        """
+        if not cells:
+            return []
+
+        if self.pdf_total is None:
+            self.pdf_total = np.sum(self.pdf)
+
+        rows, cols = np.array(list(cells)).T
+        mass_old = self.pdf[rows, cols]
+        mass_new = agent.get_cell_values(rows, cols)*self.pdf_scale
+
+        lower = mass_new < mass_old
+        rows, cols = rows[lower], cols[lower]
+
+        self.pdf[rows, cols] = mass_new[lower]
+        self.pdf_total += np.sum(mass_new[lower] - mass_old[lower])
+        self.pdf_scale = self.pdf_total     # normalize
+
+        changed = list(zip(rows.tolist(), cols.tolist()))
+        self.mark_dirty(changed, skip=channel)
+        return changed
 
     def update_information(self):
         """
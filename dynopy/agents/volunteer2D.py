@@ -7,9 +7,11 @@ import matplotlib.patches as patch
 import numpy as np
 from dynopy.agents.robot2D import Robot2D
 from dynopy.data_objects.state import State_2D
-from dynopy.data_objects.input import Input_2D
+from dynopy.data_objects.tree import Tree
+from dynopy.motion_planning.fusion_index import FusionIndex
 import dynopy.motion_planning.IRRT as irrt
 import dynopy.motion_planning.RIG_tree_R_based as RIG2
+from dynopy.tools.fusion import fuse_pdfs
 from dynopy.motion_planning.tree_analysis import update_information, identify_fusion_nodes, pick_path_max_I, \
     pick_path_max_R, prune_step, plot_tree, print_nodes_with_reward
 
@@ -19,11 +21,15 @@ class Volunteer2D(Robot2D):
         super().__init__(name, state, plot_full)
 
         self.cfg = cfg
-        self.V = []
-        self.E = []
-        self.V_closed = []
+        self.tree = Tree()
+
+        if self.cfg.get("fusion_delta") and self.cfg.get("fusion_rule", "min") != "min":
+            print("Warning: delta fusion only supports the 'min' rule, fusing full pdfs")
+            self.cfg.update({"fusion_delta": False})
+
         self.B = None
         self.channel_list = {}      # name : path
+        self.fusion_index = FusionIndex()   # channel paths by time step, updated from channel_list each cycle
         self.channel_range = {}     # name : range
         self.information_shared = {}
         self.information_novel = {}
@@ -56,6 +62,9 @@ class Volunteer2D(Robot2D):
 
                 self.channel_range.update({agent.get_name(): f})
 
+                self.track_channel(agent.get_name())
+                agent.track_channel(self.get_name())
+
                 if self.irrt:
                     # setting agents locations as goal points
                     self.goals.append([agent.get_name(), agent.get_position(), 0])
@@ -99,21 +108,40 @@ class Volunteer2D(Robot2D):
         :param channel:
         :return:
         """
+        self.fuse_channels([channel])
+
+    def fuse_channels(self, channels):
+        """
+        fuses with every agent on the channels that is in range at once, so the pdf is only normalized one time
+        :param channels: list of channel names
+        :return:
+        """
         pos1 = self.get_position()
-        agent = next(x for x in self.workspace.get_agents() if x.get_name() == channel)
+        in_range = []
 
-        _, distance = self.get_direction_and_distance(pos1, agent.get_position())
-        if abs(distance) < self.channel_range.get(agent.get_name()):
-            pdf1 = self.get_pdf()
-            pdf2 = agent.get_pdf()
+        for channel in channels:
+            agent = next(x for x in self.workspace.get_agents() if x.get_name() == channel)
 
-            for x, y in np.ndindex(pdf1.shape):
+            _, distance = self.get_direction_and_distance(pos1, agent.get_position())
+            if abs(distance) < self.channel_range.get(agent.get_name()):
+                in_range.append((channel, agent, distance))
 
-                if pdf2[x][y] < pdf1[x][y]:
-                    pdf1[x][y] = pdf2[x][y]
+        if not in_range:
+            return
 
-            pdf1 = pdf1 / np.sum(pdf1)
-            self.set_pdf(pdf1)
+        if self.cfg.get("fusion_delta"):
+            for channel, agent, _ in in_range:
+                # only cells either agent changed since they last fused are exchanged
+                cells = self.get_dirty_cells(channel) | agent.get_dirty_cells(self.get_name())
+                self.fuse_cells(cells, agent, channel)
+        else:
+            pdf = fuse_pdfs(self.get_pdf(), [agent.get_pdf() for _, agent, _ in in_range],
+                            self.cfg.get("fusion_rule", "min"), self.cfg.get("fusion_weight"))
+            self.set_pdf(pdf)
+
+        for channel, agent, distance in in_range:
+            self.clear_dirty_cells(channel)
+            agent.clear_dirty_cells(self.get_name())
             self.information_shared.update({channel: self.get_information_gained()})
             novel_information = self.get_information_gained() - self.information_shared.get(channel)
             self.information_novel.update({channel: novel_information})
@@ -124,13 +152,13 @@ class Volunteer2D(Robot2D):
                 print("Distance: {}\n".format(distance))
 
     def get_tree(self):
-        return self.V, self.E
+        return self.tree
 
     def get_nodes(self):
-        return self.V
+        return self.tree.get_nodes()
 
     def get_edges(self):
-        return self.E
+        return self.tree.get_edges()
 
     def step(self):
         """
@@ -142,12 +170,15 @@ class Volunteer2D(Robot2D):
         self.execute_planning_cycle()
 
         if self.plot_full:
-            plot_tree(self.E, "lightcoral")
+            plot_tree(self.tree.get_edges(), "lightcoral")
         root = self.path.pop()
 
         self.path_log.append(root)
-        self.V = [x for x in self.V if x != root]
-        self.E = [x for x in self.E if x[0] != root]
+
+        if self.path and self.path[-1] in self.tree:
+            self.tree.reroot(self.path[-1])
+        else:
+            self.tree.remove_node(root)
 
         action = self.trajectory.pop()
         x0, y0 = self.state.get_position()
@@ -163,24 +194,41 @@ class Volunteer2D(Robot2D):
         self.state_log.append(self.state)
         self.update_information()
 
-        for channel in self.channel_list.keys():
-            self.fuse(channel)
+        self.fuse_channels(list(self.channel_list.keys()))
 
         # TODO: update all channel paths
 
-    def sample_dynamics(self, x_0):
+    def sample_dynamics_batch(self, x_0, n):
+        """
+        samples n random inputs and propagates each of them from the state with the same model as dynamics_function
+        :param x_0: State_2D to propagate from, or a list of m states, or an (m, 3) array of x position, y position,
+        theta
+        :param n: number of samples per state
+        :return: (n, 3) array of x position, y position, theta and the (n, 2) array of direction, distance inputs, or
+        (m, n, 3) and (m, n, 2) arrays for several states
+        """
         u1_range, u2_range = self.cfg.get("dynamics_range")
 
-        r = np.random.rand(2)
+        if isinstance(x_0, State_2D):
+            X, U = self.sample_dynamics_batch([x_0], n)
+            return X[0], U[0]
+
+        if not isinstance(x_0, np.ndarray):
+            x_0 = np.array([x.get_state() for x in x_0])
 
-        u1 = u1_range[0] + r[0]*(u1_range[1] - u1_range[0])
-        u2 = u2_range[0] + r[1]*(u2_range[1] - u2_range[0])
+        x_0 = x_0.reshape(-1, 1, 3)
+        r = self.rng.random((x_0.shape[0], n, 2))
 
-        u = Input_2D(u1, u2)
+        U = np.empty(r.shape)
+        U[..., 0] = u1_range[0] + r[..., 0]*(u1_range[1] - u1_range[0])
+        U[..., 1] = u2_range[0] + r[..., 1]*(u2_range[1] - u2_range[0])
 
-        x_next = self.dynamics_function(x_0, u)
+        X = np.empty(r.shape[:2] + (3,))
+        X[..., 2] = x_0[..., 2] + U[..., 0]
+        X[..., 0] = x_0[..., 0] + U[..., 1]*np.cos(X[..., 2])
+        X[..., 1] = x_0[..., 1] + U[..., 1]*np.sin(X[..., 2])
 
-        return x_next, u
+        return X, U
 
     @staticmethod
     def dynamics_function(x_0, u):
@@ -232,7 +280,7 @@ class Volunteer2D(Robot2D):
 
         t_2 = time.process_time() - t_1 - t_0
         if self.plot_full:
-            plot_tree(self.E, 'blue')
+            plot_tree(self.tree.get_edges(), 'blue')
             # print_nodes_with_reward(self.get_tree()[0])
             # print(self.pdf)
 
@@ -263,40 +311,44 @@ class Volunteer2D(Robot2D):
         # self.V, self.E, self.V_closed = RIG_tree(self.V, self.E, self.V_closed, self.get_X_free(), self.get_X_free(),
         #                                          self.get_pdf(), self.get_position(), self.cfg)
 
+        self.fusion_index.update(self.channel_list)
+
         if not IRRT:
-            self.V, self.E = RIG2.RIG_tree(self.V, self.E, self.get_X_free(), self.get_X_free(), self.get_pdf(),
-                                           self.get_state(), self.cfg, self.sample_dynamics, self.channel_list)
+            self.tree = RIG2.RIG_tree(self.tree, self.get_X_free(), self.get_X_free(), self.get_pdf(),
+                                      self.get_state(), self.cfg, self.sample_dynamics_batch, self.fusion_index,
+                                      self.rng)
         else:
             # TODO needs to take waypoints from channel list as goal points and update as it goes
-            self.V, self.E, self.V_closed = irrt.IRRT_tree(self.V, self.E, self.V_closed, self.get_X_free(),
-                                                      self.get_X_free(), self.get_pdf(), self.get_state(), self.goal[1],
-                                                      self.cfg, self.sample_dynamics, self.channel_list, self.goal[2])
+            self.tree = irrt.IRRT_tree(self.tree, self.get_X_free(), self.get_X_free(), self.get_pdf(), self.get_state(),
+                                       self.goal[1], self.cfg, self.sample_dynamics_batch, self.fusion_index,
+                                       self.goal[2], self.rng)
 
-        # print_nodes_with_reward(self.V)
+        # print_nodes_with_reward(self.get_nodes())
 
     def select_path(self, IRRT=False):
         # for agent, path in self.channel_list.items():
         #     f = self.channel_range.get(agent)
         #     identify_fusion_nodes(self.V, path, agent, f)
+        self.fusion_index.update(self.channel_list)
 
         if not IRRT:
-            RIG2.update_information(self.V, self.E, self.pdf, self.i_gained, self.information_shared, self.channel_list,
-                                self.cfg)
+            RIG2.update_information(self.tree, self.get_pdf(), self.i_gained, self.information_shared,
+                                    self.fusion_index, self.cfg)
 
-            # self.path = pick_path_max_I(self.V, self.E)
-            self.path = pick_path_max_R(self.V, self.E)
+            # self.path = pick_path_max_I(self.tree)
+            self.path = pick_path_max_R(self.tree)
 
         else:
-            RIG2.update_information(self.V, self.E, self.pdf, self.i_gained, self.information_shared, self.channel_list,
-                                    self.cfg)
+            RIG2.update_information(self.tree, self.get_pdf(), self.i_gained, self.information_shared,
+                                    self.fusion_index, self.cfg)
 
-            self.path = irrt.pick_irrt_path(self.V, self.E)
+            self.path = irrt.pick_irrt_path(self.tree)
             # TODO: finish this
             # print([x.get_position() for x in self.path])
             # print(self.get_position())
 
     def prune_passed_nodes(self):
-        self.V, self.E = prune_step(self.V, self.E, self.path)
+        prune_step(self.tree, self.path)
         # TODO: prune the closed list
 
     def update_information(self):
@@ -324,9 +376,7 @@ class Volunteer2D(Robot2D):
 
             try:
                 self.goal = self.goals.pop()
-                self.V = []
-                self.E = []
-                self.V_closed = []
+                self.tree = Tree()
             except IndexError:
                 pass
                 # print("Home!")
@@ -0,0 +1,90 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+class SparseBelief:
+    def __init__(self, pdf):
+        """
+        Read only view of a pdf with a stack of single cell changes on top of it, used to follow the pdf down a branch
+        of the tree without copying the grid at every node. Values are the raw cell values divided by a running
+        normalizer, so renormalizing after a change is O(1).
+        :param pdf: 2D numpy array, never written to
+        """
+        self.pdf = pdf
+        self.rows, self.cols = pdf.shape
+        self.overrides = {}         # (row, col): raw value replacing the base pdf value
+        self.total = None           # sum of the raw values, computed on the first change
+        self.scale = 1.0            # raw value / scale = pdf value
+        self.stack = []             # (cell, previous raw value or None, previous total, previous scale)
+
+    def __getitem__(self, key):
+        """
+        indexes like a numpy array, ie belief[y, x], including the IndexError outside of the grid
+        """
+        cell = self.get_cell(key)
+        raw = self.overrides.get(cell)
+
+        if raw is None:
+            raw = self.pdf[cell]
+
+        return raw / self.scale
+
+    def set(self, key, value):
+        """
+        sets the pdf value of a cell then normalizes the pdf
+        :param key: (row, col) of the cell
+        :param value: new pdf value of the cell
+        :return:
+        """
+        cell = self.get_cell(key)
+
+        if self.total is None:
+            self.total = self.pdf.sum()
+
+        raw_old = self.overrides.get(cell)
+        self.stack.append((cell, raw_old, self.total, self.scale))
+
+        if raw_old is None:
+            raw_old = self.pdf[cell]
+
+        raw_new = value*self.scale
+        self.overrides[cell] = raw_new
+        self.total += raw_new - raw_old
+        self.scale = self.total
+
+    def get_depth(self):
+        return len(self.stack)
+
+    def rewind(self, depth):
+        """
+        undoes changes until only the first depth changes remain
+        :param depth: number of changes to keep
+        :return:
+        """
+        while len(self.stack) > depth:
+            cell, raw_old, self.total, self.scale = self.stack.pop()
+
+            if raw_old is None:
+                del self.overrides[cell]
+            else:
+                self.overrides[cell] = raw_old
+
+    def get_cell(self, key):
+        row, col = key
+
+        if not -self.rows <= row < self.rows or not -self.cols <= col < self.cols:
+            raise IndexError("cell {} is outside of the pdf".format(key))
+
+        return row % self.rows, col % self.cols
+
+    def to_array(self):
+        """
+
+        :return: the current pdf as a new numpy array
+        """
+        pdf = self.pdf.copy()
+
+        for cell, raw in self.overrides.items():
+            pdf[cell] = raw
+
+        return pdf / self.scale
@@ -3,10 +3,12 @@
 
 
 class Input_2D:
+    __slots__ = ("u1", "u2")
+    state_names = {"u1": "direction", "u2": "distance"}
+
     def __init__(self, direction, distance):
         self.u1 = direction
         self.u2 = distance
-        self.state_names = {"u1": "direction", "u2": "distance"}
 
     def get_direction(self):
         return self.u1
@@ -5,6 +5,8 @@ from math import sqrt
 
 
 class Node:
+    __slots__ = ("pos", "c", "i", "k", "r", "f")
+
     def __init__(self, position, cost=0, information=0.0, time=0, reward=0.0):
         """
         Data object that holds information for nodes used in motion planning.
@@ -0,0 +1,265 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+from dynopy.data_objects.node_traj import Node
+from dynopy.data_objects.state import State_2D
+
+
+class NodeStore:
+    # column name: dtype
+    COLUMNS = {"x": float, "y": float, "theta": float, "cost": float, "info": float, "time": int, "reward": float,
+               "goal": bool, "closed": bool}
+
+    # tree structure as row numbers, -1 for none, see Tree. sequence is the order nodes were added to the tree, -1 while
+    # the node isn't in one
+    LINKS = ("parent", "child", "sibling", "sequence")
+
+    def __init__(self, channels=(), capacity=256):
+        """
+        Planning tree nodes stored as one growable numpy column per value plus a nodes x channels fusion matrix, so
+        planners can read whole sets of nodes at once. The tree structure is kept in link columns next to the values.
+        Each row has a single StoredNode view, handed out by add() and get_node(), so a node can be compared by
+        identity.
+        :param channels: names of the fusion channels, in the order of the fusion matrix columns
+        :param capacity: number of rows to start with, doubled whenever the store is full
+        """
+        self.channels = list(channels)
+        self.channel_columns = {channel: c for c, channel in enumerate(self.channels)}
+
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in self.COLUMNS.items()}
+        self.columns.update({name: np.full(capacity, -1, dtype=int) for name in self.LINKS})
+        self.fusion = np.zeros((capacity, len(self.channels)))
+        self.views = [None]*capacity
+
+        self.count = 0          # rows that have ever been used
+        self.free = []          # released rows that can be reused
+
+    def __len__(self):
+        return self.count - len(self.free)
+
+    def add(self, x, y, theta, cost=0, information=0.0, time=0, reward=0.0, fusion=None, parent=None):
+        """
+        same values as node_traj.Node with the state unpacked, the input isn't kept
+        :return: StoredNode view of the new row
+        """
+        if self.free:
+            slot = self.free.pop()
+        else:
+            if self.count == len(self.fusion):
+                self.grow()
+
+            slot = self.count
+            self.count += 1
+
+        row = {"x": x, "y": y, "theta": theta, "cost": cost, "info": information, "time": time, "reward": reward,
+               "goal": False, "closed": False, "parent": -1 if parent is None else parent.slot, "child": -1,
+               "sibling": -1, "sequence": -1}
+
+        for name, value in row.items():
+            self.columns[name][slot] = value
+
+        self.fusion[slot] = 0
+        if fusion:
+            self.set_fusion(slot, fusion)
+
+        self.views[slot] = StoredNode(self, slot)
+        return self.views[slot]
+
+    def release(self, node):
+        """
+        frees the node's row for reuse. The node keeps a copy of its values so anything still holding it, ie the path
+        log, keeps working.
+        :param node: StoredNode from this store
+        :return:
+        """
+        if node.store is not self:
+            return
+
+        node.data = self.get_row(node.slot)
+        node.store = None
+        self.views[node.slot] = None
+        self.free.append(node.slot)
+
+    def grow(self):
+        capacity = 2*len(self.fusion)
+
+        for name, column in self.columns.items():
+            grown = np.full(capacity, -1 if name in self.LINKS else 0, dtype=column.dtype)
+            grown[:len(column)] = column
+            self.columns[name] = grown
+
+        fusion = np.zeros((capacity, len(self.channels)))
+        fusion[:len(self.fusion)] = self.fusion
+        self.fusion = fusion
+        self.views.extend([None]*(capacity - len(self.views)))
+
+    def get_node(self, slot):
+        """
+
+        :param slot: row of a node in use
+        :return: the StoredNode view of the row
+        """
+        return self.views[slot]
+
+    def get(self, slot, name):
+        return self.columns[name][slot].item()
+
+    def set(self, slot, name, value):
+        self.columns[name][slot] = value
+
+    def get_row(self, slot):
+        row = {name: self.columns[name][slot].item() for name in self.COLUMNS}
+        row["fusion"] = self.get_fusion(slot)
+        return row
+
+    def get_fusion(self, slot):
+        return dict(zip(self.channels, self.fusion[slot].tolist()))
+
+    def set_fusion(self, slot, fusion):
+        for channel, value in fusion.items():
+            self.fusion[slot, self.channel_columns[channel]] = value
+
+    def get_slots(self, nodes):
+        return np.fromiter((node.slot for node in nodes), dtype=int, count=len(nodes))
+
+    def get_column(self, name, nodes):
+        """
+
+        :param name: column name, see COLUMNS
+        :param nodes: list of StoredNodes from this store
+        :return: array of the column values of the nodes
+        """
+        return self.columns[name][self.get_slots(nodes)]
+
+    def get_states(self, nodes):
+        """
+
+        :param nodes: list of StoredNodes from this store
+        :return: (n, 3) array of x position, y position and theta
+        """
+        slots = self.get_slots(nodes)
+        return np.column_stack((self.columns["x"][slots], self.columns["y"][slots], self.columns["theta"][slots]))
+
+    def get_fusion_matrix(self, nodes):
+        return self.fusion[self.get_slots(nodes)]
+
+
+class StoredNode:
+    __slots__ = ("store", "slot", "data")
+
+    def __init__(self, store, slot):
+        """
+        View with the interface of node_traj.Node on a row of a NodeStore, the values are copied into the view once
+        the row is released.
+        :param store: NodeStore holding the row, None once released
+        :param slot: row of the node in the store
+        """
+        self.store = store
+        self.slot = slot
+        self.data = None
+
+    def get(self, name):
+        if self.store is None:
+            return self.data[name]
+
+        return self.store.columns[name][self.slot].item()
+
+    def set(self, name, value):
+        if self.store is None:
+            self.data[name] = value
+        else:
+            self.store.set(self.slot, name, value)
+
+    def get_x_position(self):
+        return self.get("x")
+
+    def get_y_position(self):
+        return self.get("y")
+
+    def get_position(self):
+        return self.get("x"), self.get("y")
+
+    def set_position(self, pos):
+        self.set("x", pos[0])
+        self.set("y", pos[1])
+
+    def get_pretty_position(self, digits=2):
+        pretty_pos = []
+        for item in self.get_position():
+            pretty_pos.append(round(item, digits))
+
+        return tuple(pretty_pos)
+
+    def get_state(self):
+        return State_2D(self.get("x"), self.get("y"), self.get("theta"), 0, self.get("time"))
+
+    def get_cost(self):
+        return self.get("cost")
+
+    def set_cost(self, c):
+        self.set("cost", c)
+
+    def get_information(self):
+        return self.get("info")
+
+    def set_information(self, i):
+        self.set("info", i)
+
+    def get_time(self):
+        return self.get("time")
+
+    def set_time(self, k):
+        self.set("time", k)
+
+    def get_reward(self):
+        return self.get("reward")
+
+    def set_reward(self, r):
+        self.set("reward", r)
+
+    def get_fusion(self):
+        if self.store is None:
+            return self.data["fusion"]
+
+        return self.store.get_fusion(self.slot)
+
+    def set_fusion(self, f):
+        if self.store is None:
+            self.data["fusion"] = f
+        else:
+            self.store.set_fusion(self.slot, f)
+
+    def get_goal_status(self):
+        return self.get("goal")
+
+    def set_goal_status(self, g):
+        self.set("goal", g)
+
+    def get_closed_status(self):
+        return self.get("closed")
+
+    def set_closed_status(self, closed):
+        self.set("closed", closed)
+
+    def check_fused(self, channel):
+        if channel in self.get_fusion():
+            return True
+
+    def compare_time(self, node):
+        """
+
+        :param node: node to compare time to
+        :return: boolean indicating whether the two times are the same
+        """
+        if self.get_time() == node.get_time():
+            return True
+        else:
+            return False
+
+    def copy(self):
+        node = Node(self.get_state(), None, self.get_cost(), self.get_information(), self.get_time(),
+                    self.get_reward(), self.get_fusion())
+        node.set_goal_status(self.get_goal_status())
+        node.set_closed_status(self.get_closed_status())
+        return node
@@ -3,6 +3,8 @@
 
 
 class Node:
+    __slots__ = ("x", "u", "c", "i", "k", "r", "f", "g", "o")
+
     def __init__(self, state, u, cost=0, information=0.0, time=0, reward=0.0, fusion={}):
         """
         Data object that holds information for nodes used in motion planning.
@@ -22,6 +24,7 @@ class Node:
         self.r = reward
         self.f = fusion
         self.g = False
+        self.o = False          # closed to expansion
 
     def get_x_position(self):
         return self.x.get_x_position()
@@ -81,6 +84,12 @@ class Node:
     def set_goal_status(self, g):
         self.g = g
 
+    def get_closed_status(self):
+        return self.o
+
+    def set_closed_status(self, o):
+        self.o = o
+
     def check_fused(self, channel):
         if channel in self.f:
             return True
@@ -3,14 +3,16 @@
 
 
 class State_2D:
+    __slots__ = ("x1", "x2", "x3", "x4", "k")
+    state_names = {"x1": "x position", "x2": "y position",
+                   "x3": "theta", "x4": "information"}
+
     def __init__(self, x_pos, y_pos, theta=0, info=0, time=0):
         self.x1 = x_pos
         self.x2 = y_pos
         self.x3 = theta
         self.x4 = info
         self.k = time
-        self.state_names = {"x1": "x position", "x2": "y position",
-                            "x3": "theta", "x4": "information"}
 
     def get_position(self):
         return self.x1, self.x2
@@ -0,0 +1,334 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from math import sqrt
+import numpy as np
+
+
+class Tree:
+    def __init__(self, root=None, index=None, store=None):
+        """
+        Planning tree kept in the link columns of the NodeStore holding its nodes: the parent, first child and next
+        sibling of each node as row numbers, plus the order the nodes were added in. Expanding a node or walking back
+        to the root is O(1) per step and the tree doesn't hold any per node Python objects besides the store's views.
+        Removing a single node leaves its children as roots of their own branches, the oldest remaining root is the one
+        planning continues from.
+        :param root: first node of the tree, a StoredNode
+        :param index: optional spatial index that is kept up to date as nodes are added and deleted
+        :param store: NodeStore holding the nodes, defaults to the root's. Rows are released as nodes are deleted
+        """
+        self.roots = []         # nodes without a parent
+        self.count = 0          # nodes ever added, gives each node its sequence
+        self.size = 0
+        self.index = index
+        self.store = store
+
+        if root is not None:
+            self.set_root(root)
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, node):
+        return self.store is not None and node.store is self.store and self.get_link(node.slot, "sequence") >= 0
+
+    def get_link(self, slot, name):
+        return int(self.store.columns[name][slot])
+
+    def set_link(self, slot, name, value):
+        self.store.columns[name][slot] = value
+
+    def get_root(self):
+        """
+
+        :return: the oldest node without a parent, None if the tree is empty
+        """
+        if not self.roots:
+            return None
+
+        return min(self.roots, key=lambda x: self.get_link(x.slot, "sequence"))
+
+    def set_root(self, node):
+        """
+        starts a new tree at the node, any previous nodes are dropped
+        :param node: root node
+        :return:
+        """
+        self.clear()
+
+        if self.store is None:
+            self.store = node.store
+
+        self.insert(None, node)
+        self.roots.append(node)
+
+    def set_index(self, index):
+        self.index = index
+        index.clear()
+        index.extend(self.get_nodes())
+
+    def add_node(self, parent, child):
+        self.insert(parent, child)
+        self.set_link(child.slot, "sibling", self.get_link(parent.slot, "child"))
+        self.set_link(parent.slot, "child", child.slot)
+
+    def insert(self, parent, node):
+        self.set_link(node.slot, "parent", -1 if parent is None else parent.slot)
+        self.set_link(node.slot, "child", -1)
+        self.set_link(node.slot, "sibling", -1)
+        self.set_link(node.slot, "sequence", self.count)
+        self.count += 1
+        self.size += 1
+
+        if self.index is not None:
+            self.index.insert(node)
+
+    def close(self, node):
+        """
+        marks the node as closed to expansion and leaves it out of the spatial index, so the index only holds open
+        nodes
+        :param node: node in the tree
+        :return:
+        """
+        node.set_closed_status(True)
+
+        if self.index is not None:
+            self.index.discard(node)
+
+    def get_max_reward(self):
+        """
+
+        :return: the node with the highest reward, the oldest one on ties. None if the tree is empty
+        """
+        return self.get_max("reward")
+
+    def get_max_information(self, goal=False):
+        """
+
+        :param goal: only consider nodes that reached the goal
+        :return: the node with the most information, the oldest one on ties. None if there isn't one
+        """
+        return self.get_max("info", goal)
+
+    def get_max(self, name, goal=False):
+        """
+
+        :param name: store column to compare
+        :param goal: only consider nodes that reached the goal
+        :return: the node with the highest value, the oldest one on ties. None if there isn't one
+        """
+        slots = self.get_slots()
+
+        if goal:
+            slots = slots[self.store.columns["goal"][slots]]
+
+        if not len(slots):
+            return None
+
+        # slots are in the order the nodes were added, so argmax picks the oldest on ties
+        return self.store.get_node(slots[np.argmax(self.store.columns[name][slots])])
+
+    def get_parent(self, node):
+        parent = self.get_link(node.slot, "parent")
+        return None if parent < 0 else self.store.get_node(parent)
+
+    def get_children(self, node):
+        """
+
+        :param node: node in the tree
+        :return: list of the node's children in the order they were added
+        """
+        children = []
+        child = self.get_link(node.slot, "child")
+
+        while child >= 0:
+            children.append(self.store.get_node(child))
+            child = self.get_link(child, "sibling")
+
+        children.reverse()
+        return children
+
+    def has_child_near(self, node, pos, radius):
+        """
+
+        :param node: parent node
+        :param pos: x, y position tuple
+        :param radius: search radius
+        :return: True if one of the node's children is closer than radius to the position
+        """
+        x, y = self.store.columns["x"], self.store.columns["y"]
+        child = self.get_link(node.slot, "child")
+
+        while child >= 0:
+            if sqrt((pos[0] - x[child])**2 + (pos[1] - y[child])**2) < radius:
+                return True
+
+            child = self.get_link(child, "sibling")
+
+        return False
+
+    def unlink(self, parent, node):
+        """
+        removes the node from its parent's children
+        """
+        sibling = self.get_link(node.slot, "sibling")
+        child = self.get_link(parent.slot, "child")
+
+        if child == node.slot:
+            self.set_link(parent.slot, "child", sibling)
+        else:
+            while self.get_link(child, "sibling") != node.slot:
+                child = self.get_link(child, "sibling")
+
+            self.set_link(child, "sibling", sibling)
+
+        self.set_link(node.slot, "sibling", -1)
+
+    def get_slots(self):
+        """
+
+        :return: array of the store rows of the nodes in the order they were added
+        """
+        if self.store is None:
+            return np.zeros(0, dtype=int)
+
+        sequence = self.store.columns["sequence"][:self.store.count]
+        slots = np.flatnonzero(sequence >= 0)
+        return slots[np.argsort(sequence[slots])]
+
+    def get_nodes(self):
+        """
+
+        :return: list of nodes in the order they were added
+        """
+        return [self.store.get_node(slot) for slot in self.get_slots().tolist()]
+
+    def get_edges(self):
+        """
+        compatibility view of the tree as a list of (parent, child) tuples, ie for plot_tree
+        :return: list of edges
+        """
+        if self.store is None:
+            return []
+
+        slots = self.get_slots()
+        parents = self.store.columns["parent"][slots]
+        return [(self.store.get_node(parent), self.store.get_node(slot))
+                for parent, slot in zip(parents.tolist(), slots.tolist()) if parent >= 0]
+
+    def get_path_to_root(self, node):
+        """
+
+        :param node: node to start from
+        :return: list of nodes from the node back to the root, ie [node, ..., root]
+        """
+        path = [node]
+        parent = self.get_link(node.slot, "parent")
+
+        while parent >= 0:
+            path.append(self.store.get_node(parent))
+            parent = self.get_link(parent, "parent")
+
+        return path
+
+    def drop(self, node):
+        """
+        clears the node's links and releases its row, the node must already be cut off from the rest of the tree
+        """
+        for name in self.store.LINKS:
+            self.set_link(node.slot, name, -1)
+
+        self.size -= 1
+
+        if self.index is not None:
+            self.index.discard(node)
+
+        self.store.release(node)
+
+    def delete_subtree(self, node):
+        """
+        removes the node and all of its descendants
+        :param node: top of the subtree to remove
+        :return: list of removed nodes
+        """
+        parent = self.get_parent(node)
+        if parent is not None:
+            self.unlink(parent, node)
+        else:
+            self.roots.remove(node)
+
+        removed = []
+        ol = [node]
+
+        while ol:
+            n = ol.pop()
+            ol.extend(self.get_children(n))
+            removed.append(n)
+            self.drop(n)
+
+        return removed
+
+    def remove_node(self, node):
+        """
+        removes a single node once the agent has moved past it, its children become roots of their own branches.
+        Nodes that are not in the tree are ignored.
+        :param node: node to remove
+        :return:
+        """
+        if node not in self:
+            return
+
+        parent = self.get_parent(node)
+
+        if parent is not None:
+            self.unlink(parent, node)
+        else:
+            self.roots.remove(node)
+
+        for child in self.get_children(node):
+            self.set_link(child.slot, "parent", -1)
+            self.set_link(child.slot, "sibling", -1)
+            self.roots.append(child)
+
+        self.drop(node)
+
+    def reroot(self, node):
+        """
+        makes the node the root of its tree once the agent moves on to it. The node's subtree is kept, its ancestors
+        and their other branches are deleted, so only discarded nodes are visited. Other roots are left alone.
+        :param node: node the agent is moving to
+        :return: list of removed nodes
+        """
+        removed = []
+        child = node
+        parent = self.get_parent(node)
+
+        while parent is not None:
+            for sibling in self.get_children(parent):
+                if sibling is not child:
+                    removed.extend(self.delete_subtree(sibling))
+
+            child = parent
+            parent = self.get_parent(parent)
+
+        # child is now the old root with a single line of descendants down to the node
+        while child is not node:
+            next_child = self.get_children(child)[0]
+            self.remove_node(child)
+            removed.append(child)
+            child = next_child
+
+        return removed
+
+    def clear(self):
+        for node in self.get_nodes():
+            for name in self.store.LINKS:
+                self.set_link(node.slot, name, -1)
+
+            self.store.release(node)
+
+        self.roots = []
+        self.size = 0
+
+        if self.index is not None:
+            self.index.clear()
@@ -1,32 +1,49 @@
 import math
-from time import process_time
 import matplotlib.pyplot as plt
 import numpy as np
-from dynopy.data_objects.node_traj import Node
+from dynopy.data_objects.input import Input_2D
+from dynopy.data_objects.node_store import NodeStore
+from dynopy.data_objects.state import State_2D
+from dynopy.data_objects.tree import Tree
+from dynopy.motion_planning.planning_limit import PlanningLimit
+from dynopy.motion_planning.sampler import create_sampler
+from dynopy.motion_planning.spatial_index import create_index
 from config.config import get_parameters
 
 cfg_ws = get_parameters()
 
 
-def IRRT_tree(V, E, V_closed, X_all, X_free, epsilon, x_0, x_g, cfg, f_dynamics, channel_list, b):
+def IRRT_tree(T, X_all, X_free, epsilon, x_0, x_g, cfg, f_dynamics, fusion_index, b, rng):
+    """
 
-    t_limit = cfg.get("t_limit")
+    :param T: prebuilt tree, its spatial index only holds the nodes that are still open
+    :param X_all: workspace
+    :param X_free: free space
+    :param epsilon: environment
+    :param x_0: initial state
+    :param x_g: goal position
+    :param cfg: configuration of agent
+    :param f_dynamics: dynamics function
+    :param fusion_index: FusionIndex of the other agents' paths
+    :param b: budget, nodes that cost more are closed
+    :param rng: numpy Generator the planner samples from
+    :return: the expanded tree
+    """
+    if not T:
+        T = initialize_graph(x_0, epsilon, fusion_index, cfg)
 
-    if not V:
-        V, E, V_closed = initialize_graph(x_0, epsilon, channel_list)
+    sampler = create_sampler(cfg, X_all, epsilon, x_g, rng)
+    limit = PlanningLimit(cfg, len(T))
 
-    t_0 = process_time()
-    # j = 100
-    # for _ in range(0, j):
-    while process_time() - t_0 < t_limit:
+    while limit.next(len(T)):
 
-        if not set(V).difference(V_closed):
+        if not T.index:
             # no open nodes
             break
 
-        # Expand the tree while time remains
-        pos_sample = sample_position(X_all, x_g)
-        n_nearest = find_nearest(pos_sample, list(set(V).difference(V_closed)))
+        # Expand the tree while the planning limit allows
+        pos_sample = sampler.sample()
+        n_nearest = find_nearest(pos_sample, T.index)
         x_new, u_new = steer(n_nearest.get_state(), pos_sample, f_dynamics, cfg, 'y.')
         # TODO: add in multi step
 
@@ -34,31 +51,38 @@ def IRRT_tree(V, E, V_closed, X_all, X_free, epsilon, x_0, x_g, cfg, f_dynamics,
         c_new = n_root.get_cost() + cfg.get("step_size")
         i_new = n_root.get_information() + get_information_available(epsilon, x_new.get_position())
         k_new = n_root.get_time() + 1
-        f_new = set_fusion(n_root, x_new, i_new, channel_list, cfg)
-        n_new = Node(x_new, u_new, c_new, i_new, k_new, i_new, f_new)
+        f_new = set_fusion(n_root, x_new, i_new, fusion_index, cfg)
+        n_new = T.store.add(*x_new.get_state(), c_new, i_new, k_new, i_new, f_new)
+
+        closed = False
 
         if get_distance(n_new.get_position(), x_g) < cfg.get("fusion_range"):
-            V_closed.append(n_new)
+            closed = True
             n_new.set_goal_status(True)
 
         elif c_new > b:
-            V_closed.append(n_new)
+            closed = True
+
+        if n_root and n_new and not twin_node(T, n_root, n_new, cfg):
+            T.add_node(n_root, n_new)
 
-        if n_root and n_new and not twin_node(E, n_root, n_new, cfg):
-            V.append(n_new)
-            E.append((n_root, n_new))
+            if closed:
+                T.close(n_new)
+        else:
+            T.store.release(n_new)
 
-    return V, E, V_closed
+    return T
 
 
-def initialize_graph(x_0, epsilon, channel_list):
+def initialize_graph(x_0, epsilon, fusion_index, cfg):
     """
     creates the initial graph if none has been previously computed.
 
     :param x_0: initial state
     :param epsilon: initial distribution
-    :param channel_list:
-    :return:
+    :param fusion_index: FusionIndex of the other agents' paths
+    :param cfg: configuration of agent, used to pick the spatial index
+    :return: tree with a single root node
     """
     i_init = initial_information(x_0.get_position(), epsilon)  # Initial node information
     c_init = 0                                  # Initial node cost
@@ -66,15 +90,13 @@ def initialize_graph(x_0, epsilon, channel_list):
     k_init = 0
     f_init = {}
 
-    for agent in channel_list.keys():
+    for agent in fusion_index.get_channels():
         f_init.update({agent: 0})
 
-    n_0 = Node(x_0, None, c_init, i_init, k_init, r_init, f_init)
-    v = [n_0]                                   # Node list
-    e = []
-    v_closed = []
+    store = NodeStore(fusion_index.get_channels())
+    n_0 = store.add(*x_0.get_state(), c_init, i_init, k_init, r_init, f_init)
 
-    return v, e, v_closed
+    return Tree(n_0, create_index(cfg), store)
 
 
 def initial_information(x_0, epsilon):
@@ -88,59 +110,14 @@ def initial_information(x_0, epsilon):
     return epsilon[x][y]
 
 
-def sample_position(x_all, x_goal):
-    """
-    samples the configuration space for a random node position
-    :param x_all:
-    :param x_goal
-    :return:
-    """
-    v_sample = np.random.rand()
-    if v_sample < 0.05:
-        x_sample = x_goal
-
-    else:
-        x_min, x_max = x_all.get_x_position()
-        y_min, y_max = x_all.get_y_position()
-
-        x = random_sample(x_min, x_max)
-        y = random_sample(y_min, y_max)
-        x_sample = (x, y)
-
-    return x_sample
-
-
-def random_sample(a, b):
+def find_nearest(x_s, index):
     """
-
-    :param a: lower bound
-    :param b: upper bound
-    :return: random value between a and b
-    """
-    r = np.random.rand()
-    return a + r*(b - a)
-
-
-def find_nearest(x_s, v_open):
-    """
-    finds the node in the tree closest to the sampled position
+    finds the open node in the tree closest to the sampled position
     :param x_s: sampled position tuple
-    :param v_open: set of nodes that are still open
+    :param index: spatial index of the nodes that are still open
     :return: the node with a position closest to the sampled position
     """
-
-    node_nearest = v_open[0]
-
-    min_dist = get_distance(x_s, node_nearest.get_position())
-
-    for node in v_open:
-        test_dist = get_distance(x_s, node.get_position())
-
-        if test_dist < min_dist:
-            node_nearest = node
-            min_dist = test_dist
-
-    return node_nearest
+    return index.nearest(x_s)
 
 
 def get_distance(x1, x2):
@@ -158,27 +135,23 @@ def steer(x_0, pos_sample, f, cfg, marker='g.'):
     steers a current node at a sample node
     :param x_0: state of the near node
     :param pos_sample: sampled position tuple
-    :param f: dynamics function
+    :param f: batch dynamics function, f(x_0, n) returns (n, 3) array of x, y, theta and (n, 2) array of inputs
     :param cfg: configuration data
     :param marker: color for plotting
     :return: x_feasible: a feasible position
     """
+    X, U = f(x_0, cfg.get("samples"))
+    d = np.sqrt((X[:, 0] - pos_sample[0])**2 + (X[:, 1] - pos_sample[1])**2)   # states vs a position
 
-    x_nearest = x_0
-    u_nearest = None
-    d_nearest = -1
-
-    for i in range(0, cfg.get("samples")):
-        x_new, u_new = f(x_0)                          # return a state
-        d_new = get_distance(x_new.get_position(), pos_sample)   # state vs a position
+    if cfg_ws["plot_full"]:
+        plt.plot(X[:, 0], X[:, 1], marker)
 
-        if cfg_ws["plot_full"]:
-            plt.plot(x_new.get_x_position(), x_new.get_y_position(), marker)
+    if not d.size:
+        return x_0, None
 
-        if d_new < d_nearest or d_nearest < 0:
-            x_nearest = x_new
-            u_nearest = u_new
-            d_nearest = d_new
+    i = np.argmin(d)
+    x_nearest = State_2D(X[i, 0], X[i, 1], X[i, 2], 0, x_0.get_time() + 1)
+    u_nearest = Input_2D(U[i, 0], U[i, 1])
 
     return x_nearest, u_nearest
 
@@ -195,20 +168,20 @@ def get_information_available(epsilon, pos):
     return i_available
 
 
-def set_fusion(node, x_new, i_new, channel_list, cfg):
+def set_fusion(node, x_new, i_new, fusion_index, cfg):
     """
     copies the previous node's fusion list, checks if there has been any new fusion, and update the appropriate channels
 
     :param node: parent node
     :param x_new: fusion position
     :param i_new: information gained to this point
-    :param channel_list:
+    :param fusion_index: FusionIndex of the other agents' paths
     :param cfg:
     :return:
     """
 
     f_new = node.get_fusion().copy()
-    fusion_list = check_for_fusion(x_new, channel_list, cfg)
+    fusion_list = check_for_fusion(x_new, fusion_index, cfg)
 
     for agent in fusion_list:
         f_new.update({agent: i_new})
@@ -216,75 +189,31 @@ def set_fusion(node, x_new, i_new, channel_list, cfg):
     return f_new
 
 
-def check_for_fusion(state, channel_list, cfg):
-
-    fusion_range = cfg.get("fusion_range")
-    fusion_list = []
-
-    for agent, path in channel_list.items():
-        for node in path:
-            if node.compare_time(state) and node.get_distance_from(state) < fusion_range:
-                fusion_list.append(agent)
-                break
-
-    return fusion_list
+def check_for_fusion(state, fusion_index, cfg):
+    return fusion_index.check_for_fusion(state, cfg.get("fusion_range"))
 
 
-def pick_irrt_path(v, e):
+def pick_irrt_path(T):
     """
     picks a path simply based on the highest information in a path. Defaults to paths that reached the goal state
-    :param v: list of nodes
-    :param e: list of directed node tuples
+    :param T: tree of nodes
     :return: list of nodes that represent a path
     """
+    max_node = T.get_max_information(goal=True)     # node that reached the goal with the most information
 
-    goal_nodes = []
-    goal_node = False
-
-    for n in v:
-        # check for any nodes that reached the goal
-        if n.get_goal_status():
-            goal_nodes.append(n)
-            goal_node = True
-            # print("Pos: {}\nInf: {}\n".format(n.get_position(), n.get_information()))
-
-    if goal_node:
-
-        max_node = None
-
-        for n in goal_nodes:
-            if not max_node or max_node.get_information() < n.get_information():
-                max_node = n
-
-    else:
-        max_node = max(v, key=lambda x: x.i) # finds node with most information
+    if max_node is None:
+        max_node = T.get_max_information()          # finds node with most information
 
-    path = [max_node]
+    return T.get_path_to_root(max_node)
 
-    searching = True
 
-    while searching:
-        searching = False
-        for root, leaf in e:
-            if leaf == path[-1]:
-                path.append(root)
-                searching = True
-                break
-
-    return path
-
-
-def twin_node(E, n0, n1, cfg):
-
-    twin = False
-
-    for parent, child in E:
-
-        if n0 == parent:
-            dist = get_distance(child.get_position(), n1.get_position())
-
-            if dist < cfg.get("epsilon"):
-                twin = True
-                break
-
-    return twin
+def twin_node(T, n0, n1, cfg):
+    """
+    checks if the parent already has a child within epsilon of the new node
+    :param T: tree of nodes
+    :param n0: parent node
+    :param n1: new node
+    :param cfg: configuration data, uses "epsilon"
+    :return: True if the new node duplicates a child
+    """
+    return T.has_child_near(n0, n1.get_position(), cfg.get("epsilon"))
@@ -1,19 +1,19 @@
 # !/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from math import sqrt, cos, sin, trunc, pi
-from time import process_time
+from math import sqrt, trunc, pi
 import matplotlib.pyplot as plt
 import numpy as np
-import scipy.stats as stats
 from config import config
 from dynopy.data_objects.node import Node
+from dynopy.motion_planning.planning_limit import PlanningLimit
+from dynopy.motion_planning.spatial_index import GridIndex
 from tree_analysis import plot_tree
 
 cfg = config.get_parameters()
 
 
-def RIG_tree(V,  E, V_closed, X_all, X_free, epsilon, x_0, parameters):
+def RIG_tree(V,  E, V_closed, X_all, X_free, epsilon, x_0, parameters, rng):
     """
 
     :param V: node list for a prebuilt tree
@@ -24,16 +24,16 @@ def RIG_tree(V,  E, V_closed, X_all, X_free, epsilon, x_0, parameters):
     :param epsilon: environment
     :param x_0: initial state
     :param parameters: dictionary of neccessary values: step size, budget, nearest neighbor radius, input samples, and
-    time limit for expansion
+    expansion limit, see PlanningLimit
+    :param rng: numpy Generator the planner samples from
     :return: a list of nodes and edges
     """
     # Initialize cost C, information I, starting node x_0, node list V, edge list E, and tree T
-    # np.random.seed(769)      # 50 with lambda = 0 shows a weird error where agents decides to ignore a good path
+    # rng = np.random.default_rng(769)  # 50 with lambda = 0 shows agents ignoring a good path
     d = parameters["step_size"]
     B = parameters["budget"]
     R = parameters["radius"]
     input_samples = parameters["samples"]
-    t_limit = parameters["t_limit"]
 
     if not V:
         I_init = initial_information(x_0, epsilon)      # Initial node information
@@ -43,15 +43,20 @@ def RIG_tree(V,  E, V_closed, X_all, X_free, epsilon, x_0, parameters):
         V_closed = []                                   # Closed node list
         E = []                                          # Edge list
 
+    # open nodes bucketed on the neighbor radius so near and nearest only look at nearby cells
+    closed = set(V_closed)
+    index = GridIndex(R)
+    index.extend(x for x in V if x not in closed)
+
     # Sample configuration space of vehicle and find nearest node
-    t_0 = process_time()
+    limit = PlanningLimit(parameters, len(V))
 
-    while process_time() - t_0 < t_limit:
-        x_sample = sample(X_all, parameters)
-        n_nearest = nearest(x_sample, list(set(V).difference(V_closed)))
-        x_feasible = steer(n_nearest.get_position(), x_sample, d, input_samples, 'y.')
+    while limit.next(len(V)):
+        x_sample = sample(X_all, parameters, rng)
+        n_nearest = nearest(x_sample, index)
+        x_feasible = steer(n_nearest.get_position(), x_sample, d, input_samples, rng, 'y.')
 
-        n_near = near(x_feasible, list(set(V).difference(V_closed)), R)
+        n_near = near(x_feasible, index, R)
         I_best = 0
         node_best = None
         n_best = None
@@ -61,7 +66,7 @@ def RIG_tree(V,  E, V_closed, X_all, X_free, epsilon, x_0, parameters):
                 continue
 
             # extend towards new point
-            x_new = steer(node.get_position(), x_feasible, d, input_samples)
+            x_new = steer(node.get_position(), x_feasible, d, input_samples, rng)
 
             if cfg["plot_full"]:
                 plot_tree(E)
@@ -98,6 +103,8 @@ def RIG_tree(V,  E, V_closed, X_all, X_free, epsilon, x_0, parameters):
 
             if n_best.get_cost() > B:
                 V_closed.append(n_best)
+            else:
+                index.insert(n_best)
 
     return V, E, V_closed
 
@@ -113,15 +120,16 @@ def initial_information(x_0, epsilon):
     return epsilon[x][y]
 
 
-def sample(X_all, parmeters):
+def sample(X_all, parmeters, rng):
     """
     samples the configuration space for a random node position
     # TODO: need access to current node (pos and cost) and agent positions
     :param X_all:
     :param parmeters:
+    :param rng: numpy Generator to draw from
     :return:
     """
-    v_sample = np.random.rand()
+    v_sample = rng.random()
     if v_sample < 0.05:
         # home based on current budget and distance from home
         # TODO: make this based on distance from home instead of just 5%
@@ -136,21 +144,22 @@ def sample(X_all, parmeters):
         x_min, x_max = X_all.get_x_position()
         y_min, y_max = X_all.get_y_position()
 
-        x = random_sample(x_min, x_max)
-        y = random_sample(y_min, y_max)
+        x = random_sample(x_min, x_max, rng)
+        y = random_sample(y_min, y_max, rng)
         x_sample = (x, y)
 
     return x_sample
 
 
-def random_sample(a, b):
+def random_sample(a, b, rng):
     """
 
     :param a: lower bound
     :param b: upper bound
+    :param rng: numpy Generator to draw from
     :return: random value between a and b
     """
-    r = np.random.rand()
+    r = rng.random()
     return a + r*(b - a)
 
 
@@ -158,21 +167,10 @@ def nearest(x_s, V_open):
     """
     finds the node in the tree closest to the sampled position
     :param x_s: sampled position
-    :param V_open: set of nodes that are still open
+    :param V_open: spatial index of the nodes that are still open
     :return: the node with a position closest to the sampled position
     """
-
-    node_nearest = V_open[0]
-    min_dist = get_distance(x_s, node_nearest.get_position())
-
-    for node in V_open:
-        test_dist = get_distance(x_s, node.get_position())
-
-        if test_dist < min_dist:
-            node_nearest = node
-            min_dist = test_dist
-
-    return node_nearest
+    return V_open.nearest(x_s)
 
 
 def get_distance(x1, x2):
@@ -185,58 +183,45 @@ def get_distance(x1, x2):
     return sqrt((x2[0] - x1[0])**2 + (x2[1] - x1[1])**2)
 
 
-def steer(x_0, x_sample, d, samples, marker='g.'):
+def steer(x_0, x_sample, d, samples, rng, marker='g.'):
     """
 
     :param x_0: position of the nearest node
     :param x_sample: sampled position
     :param d: step size of the agent
     :param samples: number of inputs to sample
+    :param rng: numpy Generator to draw the headings from
     :param marker: color for plotting
     :return: x_feasible, a feasible position
     """
-    # sample dynamics starting at x_nearest state
-    x_nearest = x_0
-    d_nearest = get_distance(x_0, x_sample)
+    # sample headings between 0 and 2 pi, all at once
+    theta_rand = rng.uniform(0, 2*pi, samples)
+    x_rand = x_0[0] + d*np.cos(theta_rand)
+    y_rand = x_0[1] + d*np.sin(theta_rand)
+    d_rand = np.sqrt((x_rand - x_sample[0])**2 + (y_rand - x_sample[1])**2)
 
-    # sample between -1 and 1 for x and y then normalize to 0
-    uniform = stats.uniform(loc=0, scale=2*pi)
+    if cfg["plot_full"]:
+        plt.plot(x_rand, y_rand, marker)
 
-    for i in range(0, samples):
-        theta_rand = uniform.rvs()
-        x_rand = x_0[0] + d*cos(theta_rand)
-        y_rand = x_0[1] + d*sin(theta_rand)
-        rand_pos = (x_rand, y_rand)
-        d_rand = get_distance(rand_pos, x_sample)
+    if not d_rand.size:
+        return x_0
 
-        if cfg["plot_full"]:
-            plt.plot(x_rand, y_rand, marker)
+    i = np.argmin(d_rand)
+    if d_rand[i] < get_distance(x_0, x_sample):
+        return float(x_rand[i]), float(y_rand[i])
 
-        if d_rand < d_nearest:
-            x_nearest = rand_pos
-            d_nearest = d_rand
-
-    return x_nearest
+    return x_0
 
 
 def near(x_feasible, V_open, R):
     """
 
     :param x_feasible: feasible position found
-    :param V_open: set of nodes that are still open
+    :param V_open: spatial index of the nodes that are still open
     :param R: nearest neighbor radius parameter
     :return: list of nodes near x_feasible
     """
-    nodes_near = []
-
-    for node in V_open:
-        x_node = node.get_position()
-        d = get_distance(x_node, x_feasible)
-
-        if d < R:
-            nodes_near.append(node)
-
-    return nodes_near
+    return V_open.nearby(x_feasible, R)
 
 
 def collision(x_n_near, x_new, X_free):
@@ -1,142 +1,172 @@
 import math
-from time import process_time
 import matplotlib.pyplot as plt
 import numpy as np
+from dynopy.data_objects.input import Input_2D
 from dynopy.data_objects.node_traj import Node
+from dynopy.data_objects.node_store import NodeStore
+from dynopy.data_objects.state import State_2D
+from dynopy.data_objects.tree import Tree
 from dynopy.motion_planning.tree_analysis import plot_tree
+from dynopy.motion_planning.planning_limit import PlanningLimit
+from dynopy.motion_planning.sampler import create_sampler
+from dynopy.motion_planning.spatial_index import create_index
 from config.config import get_parameters
 from tree_analysis import plot_tree
 
 cfg_ws = get_parameters()
 
 
-def update_information(V, E, epsilon_0, I_0, fused, channel_list, cfg):
+def update_information(T, epsilon_0, I_0, fused, fusion_index, cfg):
     """
+    Re-evaluates every node under the root a level of the tree at a time. A node's values only build on its parent's,
+    so each level is evaluated as arrays of the store's columns once the level above it is done. Along a branch, the
+    information gained at each node is taken out of its cell of the pdf and the pdf is normalized again, so a cell
+    visited twice on a branch only pays out what the first visit left. Branches cut off from the root keep their
+    values.
 
-    :param V: list of nodes
-    :param E: list of edges
+    :param T: tree of nodes
     :param epsilon_0: current pdf
     :param I_0: information gained so far
     :param fused: dict of information fused on each channel
-    :param channel_list: dict of channels and their path
+    :param fusion_index: FusionIndex of the other agents' paths
     :param cfg: configuration of agent
-    :return: list of nodes with updated information values
+    :return:
     """
 
-    # TODO: could probably save time here by not going through the full tree, just new nodes
-
-    ol = [V[0]]                                 # open list
-    bl = [Node(None, None, 0, I_0, 0, 0, fused)]  # branch list for visited nodes
-    cl = []                                     # closed list
-
-    # Lists aligned with the branch element to update pdf as agent travels through it
-    epsilon_list = [epsilon_0]          # last element indicates current pdf
-
-    while ol:
-        node = ol[-1]
-
-        epsilon = epsilon_list[-1]
-
-        if node not in bl:      # first time this node has been visited
-
-            # update information
-            I_gained = cfg.get("p_d")*get_information_available(epsilon, node.get_position())
-            I_parent = bl[-1].get_information()
-            node.set_information(I_gained + I_parent)
-
-            # update fusion
-            f_new = set_fusion(bl[-1], node.get_state(), node.get_information(), channel_list, cfg)
-            node.set_fusion(f_new.copy())
-
-            # update reward
-            penalty = evaluate_penalty(node.get_state(), node.get_cost(), cfg)
-            r_new = evaluate_reward(node.get_information(), node.get_fusion(), node.get_time(), penalty, cfg)
-            r_parent = bl[-1].get_reward()
-            node.set_reward(r_new + r_parent)
-
-        neighbors_all = find_neighbors(E, node)
-        neighbors_open = list(set(neighbors_all).difference(cl))
-
-        if neighbors_open:      # there are nodes to expand to
-            ol.extend(neighbors_open)
-            bl.append(node)
-
-            I_parent = bl[-1].get_information()
-            I_gained = node.get_information() - I_parent
-
-            epsilon_new = update_epsilon(epsilon, node, I_gained)
-            epsilon_list.append(epsilon_new)
-
-        elif node in bl:        # just returned to a node that has been fully explored
-            ol.pop()
-            bl.pop()
-            cl.append(node)
-            epsilon_list.pop()
-
-        else:                           # this is a leaf
-            ol.pop()
-            cl.append(node)
-
-
-def RIG_tree(V, E, X_all, X_free, epsilon, x_0, cfg, f_dynamics, channel_list):
+    root = T.get_root()
+    if root is None:
+        return
+
+    store = T.store
+    slots = T.get_slots()
+    n = len(slots)
+    p_d = cfg.get("p_d")
+
+    # parents as positions in nodes. The root hangs off a seed at n holding I_0 and fused, any other root off n + 1.
+    position = np.zeros(len(store.columns["parent"]), dtype=int)
+    position[slots] = np.arange(n)
+    parent = store.columns["parent"][slots]
+    parent = np.append(np.where(parent >= 0, position[parent], n + 1), [n, n + 1])
+    parent[position[root.slot]] = n
+
+    # depth of every node and the seed it hangs off, by pointer jumping
+    up = parent.copy()
+    depth = np.append(np.ones(n, dtype=int), [0, 0])
+    up_next = up[up]
+
+    while not np.array_equal(up_next, up):
+        depth += depth[up]
+        up = up_next
+        up_next = up[up]
+
+    order = np.flatnonzero(up[:n] == n)
+    order = order[np.argsort(depth[order], kind="stable")]
+    levels = np.searchsorted(depth[order], np.arange(1, depth[order[-1]] + 2))
+
+    # values that only depend on the node itself
+    s = slots[order]
+    P = np.column_stack((store.columns["x"][s], store.columns["y"][s]))
+    k = np.zeros(n + 2, dtype=int)
+    k[order] = store.columns["time"][s]
+    fuses = np.zeros((n + 2, len(store.channels)), dtype=bool)
+    fuses[order] = check_for_fusion_batch(P, k[order], fusion_index, cfg)
+    penalty = np.zeros(n + 2)
+    penalty[order] = evaluate_penalty_batch(P, store.columns["cost"][s], cfg)
+
+    # pdf cell of each node, -1 off the pdf, and the number of times the branch above it already visited the cell
+    rows, cols = epsilon_0.shape
+    x = np.trunc(P[:, 0]).astype(int)
+    y = np.trunc(P[:, 1]).astype(int)
+    inside = (-rows <= y) & (y < rows) & (-cols <= x) & (x < cols)
+    cell = np.full(n + 2, -1)
+    cell[order] = np.where(inside, (y % rows)*cols + x % cols, -1)
+    visits = np.zeros(n + 2, dtype=int)
+    ancestor = parent[order]
+
+    while np.any(ancestor < n):
+        visits[order] += (ancestor < n) & (cell[ancestor] == cell[order]) & (cell[order] >= 0)
+        ancestor = parent[ancestor]
+
+    # unnormalized mass left in the cell when the node reaches it
+    mass = np.zeros(n + 2)
+    mass[order] = np.where(cell[order] >= 0, epsilon_0.ravel()[cell[order]]*(1 - p_d)**visits[order], 0)
+
+    info = np.zeros(n + 2)
+    info[n] = I_0
+    fusion = np.zeros((n + 2, len(store.channels)))
+    fusion[n] = [fused.get(channel, 0.0) for channel in store.channels]
+    reward = np.zeros(n + 2)
+    channels = np.full(n + 2, len(store.channels))
+
+    # total mass of the branch pdf after the node takes its information, and the normalizer its children read with
+    total = np.zeros(n + 2)
+    total[n] = epsilon_0.sum()
+    scale = np.ones(n + 2)
+
+    for a, b in zip(levels[:-1], levels[1:]):
+        level = order[a:b]
+        p = parent[level]
+
+        i_gained = p_d*(mass[level] / scale[p])
+        info[level] = i_gained + info[p]
+        total[level] = total[p] - i_gained*scale[p]
+        scale[level] = np.where(cell[level] >= 0, total[level], scale[p])
+
+        fusion[level] = np.where(fuses[level], info[level, None], fusion[p])
+        i_novel = np.sum(info[level, None] - fusion[level], axis=1)
+        r_new = evaluate_reward_batch(info[level], i_novel, channels[level], k[level], penalty[level], cfg)
+        reward[level] = r_new + reward[p]
+
+    store.columns["info"][s] = info[order]
+    store.columns["reward"][s] = reward[order]
+    store.fusion[s] = fusion[order]
+
+
+def RIG_tree(T, X_all, X_free, epsilon, x_0, cfg, f_dynamics, fusion_index, rng):
     """
 
-    :param V: node list for a prebuilt tree
-    :param E: edge list for a prebuilt tree
+    :param T: prebuilt tree, its spatial index is kept up to date as nodes are added
     :param X_all: workspace
     :param X_free: free space
     :param epsilon: environment
     :param x_0: initial state
     :param cfg: dictionary of necessary values: step size, budget, nearest neighbor radius, input samples, and
-    time limit for expansion
+    expansion limit, see PlanningLimit
     :param f_dynamics: dynamics function
-    :param channel_list: starting fusion
-    :return: a list of nodes and edges
+    :param fusion_index: FusionIndex of the other agents' paths
+    :param rng: numpy Generator the planner samples from
+    :return: the expanded tree
     """
 
-    t_limit = cfg.get("t_limit")
-
-    if not V:
-        V, E = initialize_graph(x_0, epsilon, channel_list)
-
-    t_0 = process_time()
-    # j = 100
-    # for _ in range(0, j):
-    while process_time() - t_0 < t_limit:
-        # Expand the tree while time remains
-        pos_sample = sample_position(X_all, cfg)
-        n_nearest = find_nearest(pos_sample, V)
-        x_feasible, _ = steer(n_nearest.get_state(), pos_sample, f_dynamics, cfg, 'y.')
-        n_near = find_nearby(x_feasible, V, cfg)
-
-        r_best = None
-        parent_best = None
-        child_best = None
+    if not T:
+        T = initialize_graph(x_0, epsilon, fusion_index, cfg)
 
-        for node in n_near:
-            x_new, u_new = steer(node.get_state(), pos_sample, f_dynamics, cfg)
+    if T.index is None:
+        T.set_index(create_index(cfg))
 
-            c_new = evaluate_cost(node, cfg)
-            i_new = node.get_information() + get_information_available(epsilon, x_new.get_position())
-            k_new = node.get_time() + 1
-            f_new = set_fusion(node, x_new, i_new, channel_list, cfg)
+    sampler = create_sampler(cfg, X_all, epsilon, cfg.get("home"), rng)
+    limit = PlanningLimit(cfg, len(T))
 
-            penalty = evaluate_penalty(x_new, c_new, cfg)
-            r_new = evaluate_reward(i_new, f_new, k_new, penalty, cfg)
+    while limit.next(len(T)):
+        # Expand the tree while the planning limit allows
+        pos_sample = sampler.sample()
+        n_nearest = find_nearest(pos_sample, T.index)
+        x_feasible, _ = steer(n_nearest.get_state(), pos_sample, f_dynamics, cfg, 'y.')
+        n_near = find_nearby(x_feasible, T.index, cfg)
 
-            if not r_best or r_new > r_best:
-                parent_best = node
-                r_old = parent_best.get_reward()
-                child_best = Node(x_new, u_new, c_new, i_new, k_new, r_new + r_old, f_new)
-                r_best = r_new
+        X_new, U_new = steer_batch(T.store, n_near, pos_sample, f_dynamics, cfg)
+        parent_best, child_best = pick_best_expansion(T.store, n_near, X_new, U_new, epsilon, fusion_index, cfg)
 
-            if cfg_ws.get("plot_full"):
-                plot_tree(E)
-                plot_expansion(pos_sample, x_feasible.get_position(), node.get_position(), x_new.get_position())
+        if cfg_ws.get("plot_full"):
+            for node, x_new in zip(n_near, X_new):
+                plot_tree(T.get_edges())
+                plot_expansion(pos_sample, x_feasible.get_position(), node.get_position(), tuple(x_new[:2]))
 
-        if parent_best and child_best and not twin_node(E, parent_best, child_best, cfg):
-                V.append(child_best)
-                E.append((parent_best, child_best))
+        if parent_best and child_best:
+            if not twin_node(T, parent_best, child_best, cfg):
+                T.add_node(parent_best, child_best)
+            else:
+                T.store.release(child_best)
 
         # for _, wp in channel_list.items():
         #     x, y = wp[0].get_position()
@@ -146,7 +176,7 @@ def RIG_tree(V, E, X_all, X_free, epsilon, x_0, cfg, f_dynamics, channel_list):
         # plt.plot(n_nearest.get_x_position(), n_nearest.get_y_position(), 'go')
         # plt.plot(x_feasible.get_x_position(), x_feasible.get_y_position(), 'gx')
         # plt.plot(child_best.get_x_position(), child_best.get_y_position(), 'rs', mfc=None)
-        # plot_tree(E)
+        # plot_tree(T.get_edges())
         # plt.axis("equal")
         # plt.show()
 
@@ -154,19 +184,20 @@ def RIG_tree(V, E, X_all, X_free, epsilon, x_0, cfg, f_dynamics, channel_list):
     #     x, y = wp[0].get_position()
     #     plt.plot(x, y, 'bx')
     #
-    # plot_tree(E)
+    # plot_tree(T.get_edges())
     # plt.show()
-    return V, E
+    return T
 
 
-def initialize_graph(x_0, epsilon, channel_list):
+def initialize_graph(x_0, epsilon, fusion_index, cfg):
     """
     creates the initial graph if none has been previously computed.
 
     :param x_0: initial state
     :param epsilon: initial distribution
-    :param channel_list:
-    :return:
+    :param fusion_index: FusionIndex of the other agents' paths
+    :param cfg: configuration of agent, used to pick the spatial index
+    :return: tree with a single root node
     """
     i_init = initial_information(x_0.get_position(), epsilon)  # Initial node information
     c_init = 0                                  # Initial node cost
@@ -174,14 +205,13 @@ def initialize_graph(x_0, epsilon, channel_list):
     k_init = 0
     f_init = {}
 
-    for agent in channel_list.keys():
+    for agent in fusion_index.get_channels():
         f_init.update({agent: 0})
 
-    n_0 = Node(x_0, None, c_init, i_init, k_init, r_init, f_init)
-    v = [n_0]                                   # Node list
-    e = []
+    store = NodeStore(fusion_index.get_channels())
+    n_0 = store.add(*x_0.get_state(), c_init, i_init, k_init, r_init, f_init)
 
-    return v, e
+    return Tree(n_0, create_index(cfg), store)
 
 
 def initial_information(x_0, epsilon):
@@ -195,58 +225,14 @@ def initial_information(x_0, epsilon):
     return epsilon[x][y]
 
 
-def sample_position(x_all, parameters):
-    """
-    samples the configuration space for a random node position
-    :param x_all:
-    :param parameters:
-    :return:
-    """
-    v_sample = np.random.rand()
-    if v_sample < 0.05:
-        x_sample = parameters.get("home")
-
-    else:
-        x_min, x_max = x_all.get_x_position()
-        y_min, y_max = x_all.get_y_position()
-
-        x = random_sample(x_min, x_max)
-        y = random_sample(y_min, y_max)
-        x_sample = (x, y)
-
-    return x_sample
-
-
-def random_sample(a, b):
-    """
-
-    :param a: lower bound
-    :param b: upper bound
-    :return: random value between a and b
-    """
-    r = np.random.rand()
-    return a + r*(b - a)
-
-
-def find_nearest(x_s, v_open):
+def find_nearest(x_s, index):
     """
     finds the node in the tree closest to the sampled position
     :param x_s: sampled position tuple
-    :param v_open: set of nodes that are still open
+    :param index: spatial index of the nodes that are still open
     :return: the node with a position closest to the sampled position
     """
-
-    node_nearest = v_open[0]
-    min_dist = get_distance(x_s, node_nearest.get_position())
-
-    for node in v_open:
-        test_dist = get_distance(x_s, node.get_position())
-
-        if test_dist < min_dist:
-            node_nearest = node
-            min_dist = test_dist
-
-    return node_nearest
+    return index.nearest(x_s)
 
 
 def get_distance(x1, x2):
@@ -264,52 +250,104 @@ def steer(x_0, pos_sample, f, cfg, marker='g.'):
     steers a current node at a sample node
     :param x_0: state of the near node
     :param pos_sample: sampled position tuple
-    :param f: dynamics function
+    :param f: batch dynamics function, f(x_0, n) returns (n, 3) array of x, y, theta and (n, 2) array of inputs
     :param cfg: configuration data
     :param marker: color for plotting
     :return: x_feasible: a feasible position
     """
+    X, U = f(x_0, cfg.get("samples"))
+    d = np.sqrt((X[:, 0] - pos_sample[0])**2 + (X[:, 1] - pos_sample[1])**2)   # states vs a position
 
-    x_nearest = x_0
-    u_nearest = None
-    d_nearest = -1
-
-    for i in range(0, cfg.get("samples")):
-        x_new, u_new = f(x_0)                          # return a state
-        d_new = get_distance(x_new.get_position(), pos_sample)   # state vs a position
+    if cfg_ws["plot_full"]:
+        plt.plot(X[:, 0], X[:, 1], marker)
 
-        if cfg_ws["plot_full"]:
-            plt.plot(x_new.get_x_position(), x_new.get_y_position(), marker)
+    if not d.size:
+        return x_0, None
 
-        if d_new < d_nearest or d_nearest < 0:
-            x_nearest = x_new
-            u_nearest = u_new
-            d_nearest = d_new
+    i = np.argmin(d)
+    x_nearest = State_2D(X[i, 0], X[i, 1], X[i, 2], 0, x_0.get_time() + 1)
+    u_nearest = Input_2D(U[i, 0], U[i, 1])
 
     return x_nearest, u_nearest
 
 
-def find_nearby(x, v, cfg):
+def steer_batch(store, nodes, pos_sample, f, cfg):
     """
+    steers every node at the sample node at once, the nodes x samples matrix of candidate states is reduced to the
+    sample closest to the sampled position for each node
+    :param store: NodeStore holding the nodes
+    :param nodes: list of n nodes to steer from
+    :param pos_sample: sampled position tuple
+    :param f: batch dynamics function, f(x_0, samples) with an (n, 3) array of x, y, theta returns (n, samples, 3) and
+    (n, samples, 2) arrays
+    :param cfg: configuration data
+    :return: (n, 3) array of the steered x, y, theta and (n, 2) array of the inputs to reach them
+    """
+    if not nodes:
+        return np.empty((0, 3)), np.empty((0, 2))
 
-    :param x: state object
-    :param v: list of tree nodes
+    X, U = f(store.get_states(nodes), cfg.get("samples"))
+    d = np.sqrt((X[..., 0] - pos_sample[0])**2 + (X[..., 1] - pos_sample[1])**2)
+
+    if cfg_ws["plot_full"]:
+        plt.plot(X[..., 0].ravel(), X[..., 1].ravel(), 'g.')
+
+    j = np.argmin(d, axis=1)
+    i = np.arange(len(nodes))
+    return X[i, j], U[i, j]
+
+
+def pick_best_expansion(store, nodes, X_new, U_new, epsilon, fusion_index, cfg):
+    """
+    evaluates information, fusion, penalty and reward of every steered child at once
+    :param store: NodeStore holding the nodes, the child is added to it
+    :param nodes: list of n parent nodes
+    :param X_new: (n, 3) array of child x, y, theta
+    :param U_new: (n, 2) array of the inputs from parent to child
+    :param epsilon: environment pdf
+    :param fusion_index: FusionIndex of the other agents' paths
     :param cfg: configuration data
-    :return: list of nodes within the specified radius
+    :return: parent node and child node with the highest reward, (None, None) if there are no nodes
     """
+    if not nodes:
+        return None, None
 
-    pos_x = x.get_position()
-    r = cfg.get("radius")
-    nodes_near = []
+    P = X_new[:, :2]
+    c_new = store.get_column("cost", nodes) + cfg.get("step_size")
+    i_new = store.get_column("info", nodes) + get_information_available_batch(epsilon, P)
+    k_new = store.get_column("time", nodes) + 1
 
-    for node in v:
-        pos_node = node.get_position()
-        distance = get_distance(pos_x, pos_node)
+    # information fused on each channel by the parent, and whether the child fuses on it. The store's channels are
+    # the fusion index channels the tree was started with.
+    F = store.get_fusion_matrix(nodes)
+    fused = check_for_fusion_batch(P, k_new, fusion_index, cfg)
 
-        if distance < r:
-            nodes_near.append(node)
+    i_novel = np.sum(np.where(fused, 0, i_new[:, None] - F), axis=1)
+    n = np.full(len(nodes), len(store.channels))
 
-    return nodes_near
+    penalty = evaluate_penalty_batch(P, c_new, cfg)
+    r_new = evaluate_reward_batch(i_new, i_novel, n, k_new, penalty, cfg)
+
+    b = np.argmax(r_new)
+    parent_best = nodes[b]
+
+    f_new = np.where(fused[b], i_new[b], F[b])
+    r_best = r_new[b] + parent_best.get_reward()
+    child_best = store.add(X_new[b, 0], X_new[b, 1], X_new[b, 2], c_new[b], i_new[b], k_new[b], r_best,
+                           dict(zip(store.channels, f_new)))
+
+    return parent_best, child_best
+
+
+def find_nearby(x, index, cfg):
+    """
+
+    :param x: state object
+    :param index: spatial index of the tree nodes
+    :param cfg: configuration data
+    :return: list of nodes within the specified radius
+    """
+    return index.nearby(x.get_position(), cfg.get("radius"))
 
 
 def evaluate_cost(n_k0, cfg):
@@ -337,20 +375,20 @@ def evaluate_penalty(x_k1, cost, cfg):
     return p
 
 
-def set_fusion(node, x_new, i_new, channel_list, cfg):
+def set_fusion(node, x_new, i_new, fusion_index, cfg):
     """
     copies the previous node's fusion list, checks if there has been any new fusion, and update the appropriate channels
 
     :param node: parent node
     :param x_new: fusion position
     :param i_new: information gained to this point
-    :param channel_list:
+    :param fusion_index: FusionIndex of the other agents' paths
     :param cfg:
     :return:
     """
 
     f_new = node.get_fusion().copy()
-    fusion_list = check_for_fusion(x_new, channel_list, cfg)
+    fusion_list = check_for_fusion(x_new, fusion_index, cfg)
 
     for agent in fusion_list:
         f_new.update({agent: i_new})
@@ -358,18 +396,20 @@ def set_fusion(node, x_new, i_new, channel_list, cfg):
     return f_new
 
 
-def check_for_fusion(state, channel_list, cfg):
+def check_for_fusion_batch(P, k, fusion_index, cfg):
+    """
 
-    fusion_range = cfg.get("fusion_range")
-    fusion_list = []
+    :param P: (n, 2) array of positions
+    :param k: (n,) array of time steps
+    :param fusion_index: FusionIndex of the other agents' paths
+    :param cfg: configuration data
+    :return: (n, number of channels) boolean array, True where the position fuses on the channel
+    """
+    return fusion_index.check_for_fusion_batch(P, k, cfg.get("fusion_range"))
 
-    for agent, path in channel_list.items():
-        for node in path:
-            if node.compare_time(state) and node.get_distance_from(state) < fusion_range:
-                fusion_list.append(agent)
-                break
 
-    return fusion_list
+def check_for_fusion(state, fusion_index, cfg):
+    return fusion_index.check_for_fusion(state, cfg.get("fusion_range"))
 
 
 def evaluate_reward(i_new, f_new, k, penalty, cfg):
@@ -402,68 +442,92 @@ def evaluate_reward(i_new, f_new, k, penalty, cfg):
     return r
 
 
-def get_information_available(epsilon, pos):
-    x = math.trunc(pos[0])
-    y = math.trunc(pos[1])
+def evaluate_penalty_batch(P, cost, cfg):
+    """
+    evaluate_penalty over arrays
+    :param P: (n, 2) array of positions
+    :param cost: (n,) array of costs
+    :param cfg: configuration data
+    :return: (n,) array of penalties
+    """
+    x_home = cfg.get("home")
+    life = cfg.get("budget") - cost
 
-    try:
-        i_available = epsilon[y][x]
-    except IndexError:
-        i_available = 0
+    range_now = np.sqrt((x_home[0] - P[:, 0])**2 + (x_home[1] - P[:, 1])**2)
+    margin = life - range_now
 
-    return i_available
+    return np.where(margin < cfg.get("step_size"), margin**2, 0)
 
 
-def find_neighbors(E, node):
+def evaluate_reward_batch(i_new, i_novel, n, k, penalty, cfg):
     """
-
-    :param E: list of edges
-    :param node: base node
-    :return: list of neighbors
+    evaluate_reward over arrays
+    :param i_new: (n,) array of information gained to each node
+    :param i_novel: (n,) array of the novel information summed over the channels
+    :param n: (n,) array of the number of channels, nodes without channels get no fusion reward
+    :param k: (n,) array of time steps
+    :param penalty: (n,) array of penalties
+    :param cfg: configuration data
+    :return: (n,) array of rewards
     """
-    neighbors_list = []
-    for parent, child in E:
-        if node == parent:
-            neighbors_list.append(child)
-    return neighbors_list
+    lamb = cfg.get("lambda")
+    gamma = cfg.get("gamma")
+
+    fusion = np.divide(lamb, n, out=np.zeros(len(n)), where=n > 0)*i_novel
 
+    r = gamma**k*(i_new - fusion)                   # fusion reward
+    r -= penalty                                    # too far from home penalty
 
-def twin_node(E, n0, n1, cfg):
+    return np.maximum(r, -1)
 
-    twin = False
 
-    for parent, child in E:
+def get_information_available(epsilon, pos):
+    x = math.trunc(pos[0])
+    y = math.trunc(pos[1])
+
+    try:
+        i_available = epsilon[y, x]
+    except IndexError:
+        i_available = 0
 
-        if n0 == parent:
-            dist = get_distance(child.get_position(), n1.get_position())
+    return i_available
 
-            if dist < cfg.get("epsilon"):
-                twin = True
-                break
 
-    return twin
+def get_information_available_batch(epsilon, P):
+    """
+    get_information_available over an (n, 2) array of positions, positions outside of the pdf have no information
+    """
+    rows, cols = epsilon.shape
+    x = np.trunc(P[:, 0]).astype(int)
+    y = np.trunc(P[:, 1]).astype(int)
 
+    inside = (-rows <= y) & (y < rows) & (-cols <= x) & (x < cols)
+    i_available = np.zeros(len(P))
+    i_available[inside] = epsilon[y[inside], x[inside]]
 
-def update_epsilon(epsilon_k0, node, I_gained):
+    return i_available
 
-    I_available = get_information_available(epsilon_k0, node.get_position())
-    I_remaining = I_available - I_gained
-    epsilon_k1 = set_information_available(epsilon_k0.copy(), node, I_remaining)
-    return epsilon_k1
 
+def find_neighbors(T, node):
+    """
 
-def set_information_available(epsilon, node, value):
-    x, y = node.get_position()
-    x = math.trunc(x)
-    y = math.trunc(y)
+    :param T: tree of nodes
+    :param node: base node
+    :return: list of neighbors
+    """
+    return T.get_children(node)
 
-    try:
-        epsilon[x][y] = value
-        epsilon = normalize_pdf(epsilon)
-    except IndexError:
-        pass
 
-    return epsilon
+def twin_node(T, n0, n1, cfg):
+    """
+    checks if the parent already has a child within epsilon of the new node
+    :param T: tree of nodes
+    :param n0: parent node
+    :param n1: new node
+    :param cfg: configuration data, uses "epsilon"
+    :return: True if the new node duplicates a child
+    """
+    return T.has_child_near(n0, n1.get_position(), cfg.get("epsilon"))
 
 
 def normalize_pdf(pdf):
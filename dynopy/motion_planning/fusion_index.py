@@ -0,0 +1,119 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from math import sqrt
+import numpy as np
+
+
+class FusionIndex:
+    def __init__(self, channel_list=None):
+        """
+        Teammates' planned paths keyed by time step, so checking a state for fusion only looks at the path nodes with
+        the same time instead of every node of every path.
+        :param channel_list: dict of channels and their path, see update()
+        """
+        self.channels = []      # channel names in the order of the channel list
+        self.paths = {}         # channel: (path list, copy of the nodes it held at the last update)
+        self.by_time = {}       # channel: {k: [path nodes at time k]}
+
+        if channel_list is not None:
+            self.update(channel_list)
+
+    def get_channels(self):
+        return self.channels
+
+    def update(self, channel_list):
+        """
+        brings the index up to date with the channel list. Paths that only had nodes popped from or appended to the
+        end since the last update are patched, any other change rebuilds that channel.
+        :param channel_list: dict of channels and their path
+        :return:
+        """
+        self.channels = list(channel_list)
+
+        for channel in [x for x in self.paths if x not in channel_list]:
+            del self.paths[channel]
+            del self.by_time[channel]
+
+        for channel, path in channel_list.items():
+            path_old, nodes = self.paths.get(channel, (None, None))
+
+            if path is not path_old:
+                self.rebuild(channel, path)
+                continue
+
+            n = min(len(path), len(nodes))
+            if n and path[n - 1] is not nodes[n - 1]:
+                self.rebuild(channel, path)
+                continue
+
+            by_time = self.by_time[channel]
+
+            while len(nodes) > len(path):
+                node = nodes.pop()
+                bucket = by_time[node.get_time()]
+                bucket.remove(node)
+
+                if not bucket:
+                    del by_time[node.get_time()]
+
+            for node in path[len(nodes):]:
+                nodes.append(node)
+                by_time.setdefault(node.get_time(), []).append(node)
+
+    def rebuild(self, channel, path):
+        by_time = {}
+
+        for node in path:
+            by_time.setdefault(node.get_time(), []).append(node)
+
+        self.paths[channel] = (path, list(path))
+        self.by_time[channel] = by_time
+
+    def check_for_fusion(self, state, fusion_range):
+        """
+
+        :param state: state with a position and time
+        :param fusion_range: distance fusion is possible within
+        :return: list of channels whose path is within range of the state at the same time step
+        """
+        k = state.get_time()
+        x, y = state.get_position()
+        fusion_list = []
+
+        for channel in self.channels:
+            for node in self.by_time[channel].get(k, ()):
+                x_node, y_node = node.get_position()
+
+                if sqrt((x - x_node)**2 + (y - y_node)**2) < fusion_range:
+                    fusion_list.append(channel)
+                    break
+
+        return fusion_list
+
+    def check_for_fusion_batch(self, P, k, fusion_range):
+        """
+        check_for_fusion for many states, the states are grouped by time step so each group is checked against that
+        time step's path nodes at once
+        :param P: (n, 2) array of positions
+        :param k: (n,) array of time steps
+        :param fusion_range: distance fusion is possible within
+        :return: (n, number of channels) boolean array, True where the position fuses on the channel
+        """
+        fused = np.zeros((len(P), len(self.channels)), dtype=bool)
+        k = np.asarray(k)
+
+        for k_i in np.unique(k).tolist():
+            rows = np.flatnonzero(k == k_i)
+
+            for c, channel in enumerate(self.channels):
+                nodes = self.by_time[channel].get(k_i)
+
+                if not nodes:
+                    continue
+
+                Q = np.array([node.get_position() for node in nodes])
+                d = np.sqrt((P[rows, 0, None] - Q[:, 0])**2 + (P[rows, 1, None] - Q[:, 1])**2)
+                fused[rows, c] = np.any(d < fusion_range, axis=1)
+
+        return fused
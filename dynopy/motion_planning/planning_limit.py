@@ -0,0 +1,59 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from time import perf_counter, process_time
+
+
+class PlanningLimit:
+    # limit type: cfg key holding the limit
+    TYPES = {"cpu": "t_limit", "wall": "t_limit", "expansions": "n_limit", "nodes": "n_limit"}
+    STALL_FACTOR = 10       # "nodes" gives up after this many expansions per node asked for, ie a saturated tree
+
+    def __init__(self, cfg, n_nodes=0):
+        """
+        Decides when a planner stops expanding its tree for this planning cycle. "cpu" and "wall" stop after t_limit
+        seconds of process or wall clock time, "expansions" stops after n_limit passes through the expansion loop and
+        "nodes" once n_limit nodes have been added to the tree. The count based types don't depend on the machine, so
+        with a seeded sampler they plan the same tree every run.
+        :param cfg: configuration of agent, uses "limit_type" and "t_limit" or "n_limit"
+        :param n_nodes: number of nodes in the tree before expanding
+        """
+        self.limit_type = cfg.get("limit_type", "cpu")
+
+        if self.limit_type not in self.TYPES:
+            print("Warning: limit_type '{}' not understood, using 'cpu'".format(self.limit_type))
+            self.limit_type = "cpu"
+
+        self.limit = cfg.get(self.TYPES[self.limit_type])
+        self.expansions = 0
+        self.n_0 = n_nodes
+        self.t_0 = self.get_time()
+
+    def get_time(self):
+        if self.limit_type == "wall":
+            return perf_counter()
+
+        return process_time()
+
+    def get_expansions(self):
+        return self.expansions
+
+    def next(self, n_nodes=0):
+        """
+        checks the limit and counts the expansion about to happen
+        :param n_nodes: number of nodes currently in the tree, only used by "nodes"
+        :return: True if the planner may expand the tree again
+        """
+        if self.limit_type == "expansions":
+            remaining = self.expansions < self.limit
+
+        elif self.limit_type == "nodes":
+            remaining = n_nodes - self.n_0 < self.limit and self.expansions < self.STALL_FACTOR*self.limit
+
+        else:
+            remaining = self.get_time() - self.t_0 < self.limit
+
+        if remaining:
+            self.expansions += 1
+
+        return remaining
@@ -0,0 +1,104 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+
+class UniformSampler:
+    def __init__(self, x_all, bias, rng, p_bias=0.05):
+        """
+        Samples positions uniformly over the workspace, apart from a small chance of sampling the bias position
+        :param x_all: workspace, State_2D of (min, max) bounds
+        :param bias: position tuple sampled with probability p_bias, ie home or the goal
+        :param rng: numpy Generator to draw from
+        :param p_bias: chance of sampling the bias position
+        """
+        self.x_min, self.x_max = x_all.get_x_position()
+        self.y_min, self.y_max = x_all.get_y_position()
+        self.bias = bias
+        self.rng = rng
+        self.p_bias = p_bias
+
+    def sample(self):
+        if self.rng.random() < self.p_bias:
+            return self.bias
+
+        x = self.x_min + self.rng.random()*(self.x_max - self.x_min)
+        y = self.y_min + self.rng.random()*(self.y_max - self.y_min)
+        return x, y
+
+
+class PdfSampler:
+    def __init__(self, x_all, epsilon, bias, rng, p_bias=0.05, batch=256):
+        """
+        Samples positions in proportion to the pdf, so expansions head for the cells that still hold information. The
+        cumulative table is built once, so build a new sampler whenever the pdf changes, ie each planning cycle.
+        Positions are drawn a batch at a time and handed out one per sample() call.
+        :param x_all: workspace, State_2D of (min, max) bounds, sampled uniformly if the pdf has no probability left
+        :param epsilon: 2D pdf, epsilon[y][x]
+        :param bias: position tuple sampled with probability p_bias, ie home or the goal
+        :param rng: numpy Generator to draw from
+        :param p_bias: chance of sampling the bias position
+        :param batch: number of positions drawn at once
+        """
+        self.bias = bias
+        self.rng = rng
+        self.p_bias = p_bias
+        self.batch = batch
+
+        self.cols = np.shape(epsilon)[1]
+        self.cdf = np.cumsum(np.ravel(epsilon))
+
+        self.uniform = None
+        if not self.cdf.size or self.cdf[-1] <= 0:
+            self.uniform = UniformSampler(x_all, bias, rng, p_bias)
+
+        self.positions = []
+
+    def sample(self):
+        if self.uniform:
+            return self.uniform.sample()
+
+        if not self.positions:
+            self.draw()
+
+        return self.positions.pop()
+
+    def draw(self):
+        """
+        refills the positions with a batch drawn from the cumulative table, each position lands uniformly inside its
+        cell
+        :return:
+        """
+        cells = np.searchsorted(self.cdf, self.rng.random(self.batch)*self.cdf[-1], side="right")
+        cells = np.minimum(cells, self.cdf.size - 1)
+        rows, cols = np.divmod(cells, self.cols)
+
+        offset = self.rng.random((self.batch, 2))
+        x = (cols + offset[:, 0]).tolist()
+        y = (rows + offset[:, 1]).tolist()
+        biased = (self.rng.random(self.batch) < self.p_bias).tolist()
+
+        # popped from the end, reversed to hand them out in the order they were drawn
+        self.positions = [self.bias if b else (x_i, y_i) for x_i, y_i, b in zip(x, y, biased)][::-1]
+
+
+def create_sampler(cfg, x_all, epsilon, bias, rng):
+    """
+    builds the position sampler named by the agent configuration
+    :param cfg: configuration of agent, uses "sampler" ("uniform" or "pdf")
+    :param x_all: workspace
+    :param epsilon: current pdf
+    :param bias: position tuple sampled 5% of the time, ie home or the goal
+    :param rng: numpy Generator to draw from
+    :return: sampler with a sample() method returning a position tuple
+    """
+    sampler_type = cfg.get("sampler", "uniform")
+
+    if sampler_type == "pdf":
+        return PdfSampler(x_all, epsilon, bias, rng)
+
+    elif sampler_type != "uniform":
+        print("Warning: sampler '{}' not understood, using 'uniform'".format(sampler_type))
+
+    return UniformSampler(x_all, bias, rng)
@@ -0,0 +1,269 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from math import ceil, floor, sqrt, inf
+import numpy as np
+
+
+class GridIndex:
+    def __init__(self, cell_size=1.0):
+        """
+        Uniform grid over the workspace used to find tree nodes near a position without scanning the whole tree.
+        Sizing the cells to the neighbor radius keeps a radius query to the 3x3 block of cells around the position.
+        Each cell is a linked list through the store rows of its nodes, so the index only adds a row number per node.
+        :param cell_size: side length of a grid cell, defaults to one workspace cell
+        """
+        self.cell_size = cell_size
+        self.cells = {}         # (i, j): first store row in the cell
+        self.next = np.zeros(0, dtype=int)  # store row: next row in the same cell, -1 at the end, -2 if not indexed
+        self.store = None       # NodeStore of the indexed nodes
+        self.size = 0
+        self.bounds = None      # (i_min, i_max, j_min, j_max) of every cell that has held a node
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, node):
+        return node.store is self.store and node.slot < len(self.next) and self.next[node.slot] != -2
+
+    def get_cell(self, pos):
+        return floor(pos[0] / self.cell_size), floor(pos[1] / self.cell_size)
+
+    def insert(self, node):
+        if self.store is None:
+            self.store = node.store
+
+        if node.slot >= len(self.next):
+            grown = np.full(len(self.store.views), -2, dtype=int)
+            grown[:len(self.next)] = self.next
+            self.next = grown
+
+        cell = self.get_cell(node.get_position())
+        self.next[node.slot] = self.cells.get(cell, -1)
+        self.cells[cell] = node.slot
+        self.size += 1
+
+        i, j = cell
+        if not self.bounds:
+            self.bounds = (i, i, j, j)
+        else:
+            i_min, i_max, j_min, j_max = self.bounds
+            self.bounds = (min(i, i_min), max(i, i_max), min(j, j_min), max(j, j_max))
+
+    def extend(self, nodes):
+        for node in nodes:
+            self.insert(node)
+
+    def discard(self, node):
+        """
+        removes a node from the index, nodes that were never inserted are ignored
+        :param node: node to remove
+        :return:
+        """
+        if node not in self:
+            return
+
+        cell = self.get_cell(node.get_position())
+        slot = self.cells[cell]
+
+        if slot == node.slot:
+            if self.next[slot] < 0:
+                del self.cells[cell]
+            else:
+                self.cells[cell] = int(self.next[slot])
+        else:
+            while self.next[slot] != node.slot:
+                slot = self.next[slot]
+
+            self.next[slot] = self.next[node.slot]
+
+        self.next[node.slot] = -2
+        self.size -= 1
+
+    def clear(self):
+        self.cells = {}
+        self.next = np.zeros(0, dtype=int)
+        self.store = None
+        self.size = 0
+        self.bounds = None
+
+    def get_slots(self, cells):
+        """
+
+        :param cells: iterable of (i, j) cells
+        :return: array of the store rows of the nodes in the cells
+        """
+        slots = []
+
+        for cell in cells:
+            slot = self.cells.get(cell, -1)
+
+            while slot >= 0:
+                slots.append(slot)
+                slot = self.next[slot]
+
+        return np.array(slots, dtype=int)
+
+    def get_distances(self, pos, slots):
+        return np.sqrt((self.store.columns["x"][slots] - pos[0])**2 + (self.store.columns["y"][slots] - pos[1])**2)
+
+    def nearest(self, pos):
+        """
+        searches rings of cells outward from the position until no closer node can exist
+        :param pos: x, y position tuple
+        :return: the node closest to the position, None if the index is empty
+        """
+        if not self.size:
+            return None
+
+        ci, cj = self.get_cell(pos)
+        i_min, i_max, j_min, j_max = self.bounds
+        ring_max = max(abs(ci - i_min), abs(ci - i_max), abs(cj - j_min), abs(cj - j_max))
+
+        slot_nearest = None
+        min_dist = inf
+        cells_checked = 0
+
+        for ring in range(0, ring_max + 1):
+            if (ring - 1)*self.cell_size > min_dist:
+                break
+
+            cells = list(self.get_ring(ci, cj, ring))
+            cells_checked += len(cells)
+            slots = self.get_slots(cells)
+
+            if len(slots):
+                dist = self.get_distances(pos, slots)
+                best = self.pick_oldest(slots, dist, dist.min())
+
+                if dist.min() < min_dist or (dist.min() == min_dist and self.is_older(best, slot_nearest)):
+                    slot_nearest = best
+                    min_dist = dist.min()
+
+            if cells_checked > self.size:
+                # sparse tree, a plain scan is cheaper than visiting more empty cells
+                return self.nearest_linear(pos)
+
+        return self.store.get_node(slot_nearest)
+
+    def nearby(self, pos, radius):
+        """
+        collects the nodes closer than radius to the position by only visiting the cells the radius overlaps
+        :param pos: x, y position tuple
+        :param radius: search radius
+        :return: list of nodes within the radius, in the order they were added to the tree
+        """
+        ci, cj = self.get_cell(pos)
+        reach = ceil(radius / self.cell_size)
+        cells = ((i, j) for i in range(ci - reach, ci + reach + 1) for j in range(cj - reach, cj + reach + 1))
+        slots = self.get_slots(cells)
+
+        if not len(slots):
+            return []
+
+        slots = slots[self.get_distances(pos, slots) < radius]
+        slots = slots[np.argsort(self.store.columns["sequence"][slots])]
+        return [self.store.get_node(slot) for slot in slots.tolist()]
+
+    def nearest_linear(self, pos):
+        slots = np.flatnonzero(self.next >= -1)
+        dist = self.get_distances(pos, slots)
+        return self.store.get_node(self.pick_oldest(slots, dist, dist.min()))
+
+    def pick_oldest(self, slots, dist, min_dist):
+        """
+        breaks ties between equally close nodes by the order they were added to the tree
+        """
+        closest = slots[dist == min_dist]
+        return int(closest[np.argmin(self.store.columns["sequence"][closest])])
+
+    def is_older(self, slot, other):
+        sequence = self.store.columns["sequence"]
+        return other is None or sequence[slot] < sequence[other]
+
+    @staticmethod
+    def get_ring(ci, cj, ring):
+        """
+        cells whose chebyshev distance from (ci, cj) is exactly ring
+        """
+        if ring == 0:
+            yield ci, cj
+            return
+
+        for i in range(ci - ring, ci + ring + 1):
+            yield i, cj - ring
+            yield i, cj + ring
+
+        for j in range(cj - ring + 1, cj + ring):
+            yield ci - ring, j
+            yield ci + ring, j
+
+
+class LinearIndex:
+    def __init__(self):
+        """
+        Reference index that scans every node, kept for benchmarking against GridIndex.
+        """
+        self.nodes = {}         # node: position
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, node):
+        return node in self.nodes
+
+    def insert(self, node):
+        self.nodes[node] = node.get_position()
+
+    def extend(self, nodes):
+        for node in nodes:
+            self.insert(node)
+
+    def discard(self, node):
+        self.nodes.pop(node, None)
+
+    def clear(self):
+        self.nodes = {}
+
+    def nearest(self, pos):
+        node_nearest = None
+        min_dist = inf
+
+        for node, pos_node in self.nodes.items():
+            test_dist = get_distance(pos, pos_node)
+
+            if test_dist < min_dist:
+                node_nearest = node
+                min_dist = test_dist
+
+        return node_nearest
+
+    def nearby(self, pos, radius):
+        return [node for node, pos_node in self.nodes.items() if get_distance(pos, pos_node) < radius]
+
+
+def create_index(cfg):
+    """
+    builds the spatial index named by the agent configuration
+    :param cfg: configuration of agent, uses "spatial_index" ("grid" or "linear") and "radius" for the grid cell size
+    :return: an empty index
+    """
+    index_type = cfg.get("spatial_index", "grid")
+
+    if index_type == "linear":
+        return LinearIndex()
+
+    elif index_type != "grid":
+        print("Warning: spatial index '{}' not understood, using 'grid'".format(index_type))
+
+    return GridIndex(cfg.get("radius", 1.0))
+
+
+def get_distance(x1, x2):
+    """
+
+    :param x1: first x, y position
+    :param x2: second x, y position
+    :return: euclidean distance apart
+    """
+    return sqrt((x2[0] - x1[0])**2 + (x2[1] - x1[1])**2)
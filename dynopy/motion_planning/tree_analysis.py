@@ -4,13 +4,13 @@
 from math import trunc
 import matplotlib.pyplot as plt
 import numpy as np
+from dynopy.data_objects.belief import SparseBelief
 
 
-def update_information(V, E, epsilon_0, cfg, I_0, channels=None, fused=None):
+def update_information(T, epsilon_0, cfg, I_0, channels=None, fused=None):
     """
     Walk through the path and update information at each node.
-    :param V: list of nodes
-    :param E: list of edges
+    :param T: tree of nodes
     :param epsilon_0: information in the environment
     :param cfg: configuration of agent, uses parameters "p_d" and "lambda" for probability of detection and preference
     for fusion vs information gain
@@ -19,14 +19,16 @@ def update_information(V, E, epsilon_0, cfg, I_0, channels=None, fused=None):
     :param fused: dictionary of amount of information fused so far {channel: information fused}
     :return: List of nodes with updated information values
     """
-    ol = [V[0]]     # open list
+    root = T.get_root()
+    ol = [root]     # open list
     bl = []         # branch list for visited nodes
-    cl = []         # closed list
+    cl = set()      # closed list
 
-    epsilon_list = [epsilon_0]
-    reward_list = [V[0].get_reward()]
+    epsilon = SparseBelief(epsilon_0)
+    depth_list = [0]        # depth of the pdf changes on each branch
+    reward_list = [root.get_reward()]
 
-    time_0 = V[0].get_time()
+    time_0 = root.get_time()
     # print("Node Time: {}".format(time_0))
 
     if not fused:
@@ -36,7 +38,7 @@ def update_information(V, E, epsilon_0, cfg, I_0, channels=None, fused=None):
 
     while ol:
         node = ol[-1]
-        epsilon = epsilon_list[-1]
+        epsilon.rewind(depth_list[-1])
         r_0 = reward_list[-1]
         fused = fused_list[-1]
 
@@ -56,8 +58,8 @@ def update_information(V, E, epsilon_0, cfg, I_0, channels=None, fused=None):
             reward = cfg.get("gamma")**time_k*(node.get_information() - cfg.get("lambda")*I_novel)
             node.set_reward(reward + r_0)
 
-        neighbors_all = find_neighbors(E, node)
-        neighbors_open = list(set(neighbors_all).difference(cl))
+        neighbors_all = find_neighbors(T, node)
+        neighbors_open = [x for x in neighbors_all if x not in cl]
 
         if neighbors_open:      # There are nodes to expand to
             ol.extend(neighbors_open)
@@ -66,8 +68,8 @@ def update_information(V, E, epsilon_0, cfg, I_0, channels=None, fused=None):
             I_parent = bl[-1].get_information() if bl else 0
             I_gained = node.get_information() - I_parent
 
-            epsilon_new = update_epsilon(epsilon, node, I_gained)
-            epsilon_list.append(epsilon_new)
+            update_epsilon(epsilon, node, I_gained)
+            depth_list.append(epsilon.get_depth())
 
             reward_list.append(node.get_reward())
 
@@ -81,14 +83,14 @@ def update_information(V, E, epsilon_0, cfg, I_0, channels=None, fused=None):
         elif node in bl:        # Returned to a  branch that has been fully explored
             ol.pop()
             bl.pop()
-            cl.append(node)
-            epsilon_list.pop()
+            cl.add(node)
+            depth_list.pop()
             reward_list.pop()
             fused_list.pop()
 
         else:                   # This was the leaf of the branch
             ol.pop()
-            cl.append(node)
+            cl.add(node)
 
 
 def get_information_gained(epsilon, node, p_d):
@@ -112,12 +114,18 @@ def create_zero_dict_from_list(channels):
     return item_dict
 
 
-def update_epsilon(epsilon_k0, node, I_gained):
-
-    I_available = get_information_available(epsilon_k0, node)
+def update_epsilon(epsilon, node, I_gained):
+    """
+    removes the information gained at the node from the pdf, the change can be undone with epsilon.rewind()
+    :param epsilon: SparseBelief of the pdf along the current branch
+    :param node: node the information was gained at
+    :param I_gained: information gained at the node
+    :return: the same SparseBelief
+    """
+    I_available = get_information_available(epsilon, node)
     I_remaining = I_available - I_gained
-    epsilon_k1 = set_information_available(epsilon_k0.copy(), node, I_remaining)
-    return epsilon_k1
+    set_information_available(epsilon, node, I_remaining)
+    return epsilon
 
 
 def update_fused(channels, node, fused):
@@ -166,7 +174,7 @@ def get_information_available(epsilon, node):
     y = trunc(y)
 
     try:
-        I_available = epsilon[y][x]
+        I_available = epsilon[y, x]
     except IndexError:
         I_available = 0
 
@@ -179,8 +187,7 @@ def set_information_available(epsilon, node, value):
     y = trunc(y)
 
     try:
-        epsilon[x][y] = value
-        epsilon = normalize_pdf(epsilon)
+        epsilon.set((x, y), value)
     except IndexError:
         pass
 
@@ -196,18 +203,14 @@ def apply_planned_path_discount(epsilon, agents):
 
 
 
-def find_neighbors(E, node):
+def find_neighbors(T, node):
     """
 
-    :param E: list of edges
+    :param T: tree of nodes
     :param node: base node
     :return: list of neighbors
     """
-    neighbors_list = []
-    for parent, child in E:
-        if node == parent:
-            neighbors_list.append(child)
-    return neighbors_list
+    return T.get_children(node)
 
 
 def identify_fusion_nodes(V_a, V_b, channel, fusion_range):
@@ -229,89 +232,47 @@ def identify_fusion_nodes(V_a, V_b, channel, fusion_range):
                 # print("fusion with {} found at: {}, k = {}".format(channel, node_a.get_position(), node_a.get_time()))
 
 
-def pick_path_max_I(V, E):
+def pick_path_max_I(T):
     """
     picks a path simply based on the highest information in a path
-    :param V: list of nodes
-    :param E: list of directed node tuples
+    :param T: tree of nodes
     :return: list of nodes that represent a path
     """
 
-    max_node = max(V, key=lambda x: x.r)  # finds node with most information
-    path = [max_node]
-
-    searching = True
+    max_node = T.get_max_reward()  # finds node with most information
+    return T.get_path_to_root(max_node)
 
-    while searching:
-        searching = False
-        for root, leaf in E:
-            if leaf == path[-1]:
-                path.append(root)
-                searching = True
-                break
 
-    return path
-
-
-def pick_path_max_R(V, E):
-    # TODO: make descending tree (find _root) a separate function
-    max_node = max(V, key=lambda x: x.r)  # finds node with most reward
+def pick_path_max_R(T):
+    """
+    picks the path to the node with the highest reward
+    :param T: tree of nodes
+    :return: list of nodes from the selected node back to the root
+    """
+    max_node = T.get_max_reward()  # finds node with most reward
     # print("Max node in pick_path_max_R = {}".format(max_node.get_position()))
-    path = [max_node]
-
-    v_sorted = sorted(V, key=lambda x: x.r)
-    v_other_max = v_sorted[-1]
-    searching = True
-
-    while searching:
-        searching = False
-        for root, leaf in E:
-            if leaf == path[-1]:
-                path.append(root)
-                searching = True
-                break
 
-    return path
+    return T.get_path_to_root(max_node)
 
 
-def prune_step(V, E, path):
-    ol = []
+def prune_step(T, path):
+    """
+    removes every branch leaving the root other than the one the path continues along
+    :param T: tree of nodes
+    :param path: list of nodes from the selected node back to the root
+    :return: list of removed nodes
+    """
     cl = []
 
-    for root, leaf in E:
-        try:
-            if root == V[0] and leaf != path[-2]:
-                ol.append(leaf)
-        except IndexError:
-            # print("ERROR: path only has one node")
-            break
-
-    while ol:
-        node = ol[-1]
-        neighbors_all = find_neighbors(E, node)
-        neighbors_open = list(set(neighbors_all).difference(cl))
-
-        if neighbors_open:
-            ol.extend(neighbors_open)
-
-        else:
-            ol.pop()
-            cl.append(node)
-
-    V = delete_nodes(V, cl)
-    E = delete_edges_by_leaf(E, cl)
-
-    return V, E
-
-
-def delete_nodes(V, nodes):
-    V = [x for x in V if x not in nodes]
-    return V
+    if len(path) < 2:
+        # print("ERROR: path only has one node")
+        return cl
 
+    for leaf in list(T.get_children(T.get_root())):
+        if leaf != path[-2]:
+            cl.extend(T.delete_subtree(leaf))
 
-def delete_edges_by_leaf(E, leafs):
-    E = [x for x in E if x[1] not in leafs]
-    return E
+    return cl
 
 
 def plot_leaves(V):
@@ -343,7 +304,7 @@ def print_nodes_with_reward(V):
     print()
     print("Nodes with reward values:")
     print()
-    V_sorted = sorted(V, key=lambda x: x.r)
+    V_sorted = sorted(V, key=lambda x: x.get_reward())
     for node in V_sorted:
         if node.get_reward():
             print("Time step: {}, Pos: {}, Reward: {} \n".format(node.get_time(), node.get_pretty_position(),
@@ -354,7 +315,7 @@ def print_leafs_with_reward(V, E):
     print()
     print("Leafs with reward values:")
     print()
-    V_sorted = sorted(V, key=lambda x: x.r)
+    V_sorted = sorted(V, key=lambda x: x.get_reward())
 
     for node in V_sorted:
         leaf = True
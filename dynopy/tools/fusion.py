@@ -0,0 +1,62 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+
+def fuse_pdfs(pdf, others, rule="min", weight=None):
+    """
+    fuses one or more pdfs into pdf in place and normalizes it. The min rule takes the others one after another and
+    normalizes after each, the same as fusing with each agent on its own. The other rules normalize once at the end.
+    :param pdf: 2D numpy array of the agent's own pdf, overwritten with the result
+    :param others: list of 2D numpy arrays from the agents being fused with
+    :param rule: "min" for the elementwise minimum, "product" for the elementwise product, or "ci" for a weighted
+    geometric mean in the style of covariance intersection
+    :param weight: weight of the agent's own pdf for "ci", the rest is split evenly between the others. Defaults to
+    an even split over every pdf.
+    :return: the fused pdf
+    """
+    if not others:
+        return pdf
+
+    if rule == "min":
+        for other in others:
+            np.minimum(pdf, other, out=pdf)
+            normalize(pdf)
+
+        return pdf
+
+    elif rule == "product":
+        for other in others:
+            np.multiply(pdf, other, out=pdf)
+
+    elif rule == "ci":
+        if weight is None:
+            weight = 1 / (len(others) + 1)
+
+        weight_other = (1 - weight) / len(others)
+
+        np.power(pdf, weight, out=pdf)
+        for other in others:
+            pdf *= other**weight_other
+
+    else:
+        print("Warning: fusion rule '{}' not understood, pdf was not fused".format(rule))
+        return pdf
+
+    normalize(pdf)
+
+    return pdf
+
+
+def normalize(pdf):
+    """
+    normalizes the pdf in place, a pdf without any probability left is left alone
+    :param pdf: 2D numpy array
+    :return:
+    """
+    total = pdf.sum()
+    if total > 0:
+        pdf /= total
+    else:
+        print("Warning: fused pdf has no probability left, it was not normalized")
@@ -6,6 +6,7 @@ import os
 from dynopy.workspace.workspace import Workspace
 from dynopy.agents.lineFollwer2D import LineFollower2D
 from dynopy.agents.volunteer2D import Volunteer2D
+from dynopy.motion_planning.planning_limit import PlanningLimit
 
 
 def load_workspace(filename, base_folder):
@@ -68,7 +69,8 @@ def read_workspace_file(filename):
     return boundary, e_params, positions
 
 
-def load_volunteer(cfg, lamb=0.99, budget=60, t_limit=0.1, gamma=1, irrt=False, plot_full=False, name="Blinky"):
+def load_volunteer(cfg, lamb=0.99, budget=60, t_limit=0.1, gamma=1, irrt=False, plot_full=False, name="Blinky",
+                   limit_type=None, n_limit=None):
     """
     Creates a Volunteer2D object without a current position
     :param cfg: file with dictionary of default parameters
@@ -79,6 +81,9 @@ def load_volunteer(cfg, lamb=0.99, budget=60, t_limit=0.1, gamma=1, irrt=False,
     :param irrt: run robot as irrt
     :param plot_full:
     :param name: default parameters to use
+    :param limit_type: how planning is limited each step, see PlanningLimit. None keeps the configured type
+    :param n_limit: int greater than 0 for the expansions or nodes per step of the count based limit types, None keeps
+    the configured number
     :return:
     """
 
@@ -100,6 +105,14 @@ def load_volunteer(cfg, lamb=0.99, budget=60, t_limit=0.1, gamma=1, irrt=False,
         gamma = 1.0
         print("Warning: gamma set out of range [0.0, 1.0], setting to 1.0")
 
+    if limit_type is not None and limit_type not in PlanningLimit.TYPES:
+        print("Warning: limit_type '{}' not understood, keeping the configured type".format(limit_type))
+        limit_type = None
+
+    if n_limit is not None and n_limit < 1:
+        n_limit = 1
+        print("Warning: n_limit set to less than 1, setting to 1")
+
     cfg_volunteer = cfg.load_agent_parameters(name)
 
     cfg_volunteer.update({"lambda": lamb})
@@ -107,6 +120,12 @@ def load_volunteer(cfg, lamb=0.99, budget=60, t_limit=0.1, gamma=1, irrt=False,
     cfg_volunteer.update({"t_limit": t_limit})
     cfg_volunteer.update({"gamma": gamma})
 
+    if limit_type is not None:
+        cfg_volunteer.update({"limit_type": limit_type})
+
+    if n_limit is not None:
+        cfg_volunteer.update({"n_limit": n_limit})
+
     robot = Volunteer2D(name, cfg_volunteer, irrt=irrt, plot_full=plot_full)
 
     return robot
@@ -160,74 +179,17 @@ def read_parameter_file(file):
                 "n_runs": int(row.get("n_runs"))
             })
 
-            params_list.append(row)
-
-    return params_list
-
-
-def write_results_to_file(file, data_list):
-
-    if not os.path.isfile(file):
-        with open(file, 'w', newline='') as fout:
-            fieldnames = data_list[0].keys()
-            writer = csv.DictWriter(fout, fieldnames=fieldnames, delimiter=',')
-            writer.writeheader()
-
-            for row in data_list:
-                writer.writerow(row)
-
-    else:
-        with open(file, 'a', newline='') as fout:
-            fieldnames = data_list[0].keys()
-            writer = csv.DictWriter(fout, fieldnames=fieldnames, delimiter=',')
-
-            for row in data_list:
-                writer.writerow(row)
-
-
-def read_results_file(filename, base_folder):
-    # TODO: this should also be able to read dynamic number of agents
-    results_list = []
-    file = os.path.join(base_folder, 'results', filename)
-
-    with open(file, 'r', encoding='utf8') as fin:
-        reader = csv.DictReader(fin, skipinitialspace=True)
-
-        for row in reader:
-            results = {}
-            results.update({
-                "I_Gained": float(row.get("I_Gained")),
-                "I_Fused": float(row.get("I_Fused")),
-                "param_set": int(row.get("param_set")),
-                "run": int(row.get("run"))
-            })
-
-            results_list.append(results)
-
-    return results_list
-
-
-def read_parameter_sets_file(filename, base_folder):
-    # TODO: this should also be able to read dynamic number of agents
-    results_list = []
-    file = os.path.join(base_folder, 'results', filename)
-
-    with open(file, 'r', encoding='utf8') as fin:
-        reader = csv.DictReader(fin, skipinitialspace=True)
-
-        for row in reader:
-            row.update({
-                "lambda": float(row.get("lambda")),
-                "budget": int(row.get("budget")),
-                "t_limit": float(row.get("t_limit")),
-                "gamma": float(row.get("gamma")),
-                "n_agents": int(row.get("n_agents")),
-                "n_runs": int(row.get("n_runs")),
-                "param_set": int(row.get("param_set")),
-            })
-
-            results_list.append(row)
+            # optional planning limit columns, blank cells use the volunteer's configured limit
+            if row.get("limit_type"):
+                row.update({"limit_type": row.get("limit_type").strip()})
+            else:
+                row.pop("limit_type", None)
 
-    return results_list
+            if row.get("n_limit"):
+                row.update({"n_limit": int(row.get("n_limit"))})
+            else:
+                row.pop("n_limit", None)
 
+            params_list.append(row)
 
+    return params_list
@@ -0,0 +1,198 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import numpy as np
+import scipy.stats as stats
+import dynopy.tools.initialize as init
+
+
+class LockStepSimulation:
+    def __init__(self, pdf, paths, p_d, n_replicas=None, fusion_range=None):
+        """
+        Runs N independent replicas of a scenario with only dedicated LineFollower2D agents, all advanced together one
+        time step at a time with array operations instead of agent objects. Every agent keeps its own belief, so the
+        beliefs are an (N, agents, H, W) stack, and each step updates every replica and agent at once the way
+        Robot2D.update_information does.
+        :param pdf: (H, W) prior shared by every replica, or an (N, H, W) stack with one prior per replica
+        :param paths: (agents, steps + 1, 2) positions of each agent at each time step shared by every replica, or an
+        (N, agents, steps + 1, 2) stack with one set of paths per replica. Step 0 is the starting position.
+        :param p_d: list of each agent's chance of detection
+        :param n_replicas: number of replicas N, only needed when neither pdf nor paths is a stack
+        :param fusion_range: agents within this distance min fuse their beliefs after every step, None never fuses
+        """
+        pdf = np.asarray(pdf, dtype=float)
+        paths = np.asarray(paths, dtype=float)
+
+        if n_replicas is None:
+            n_replicas = pdf.shape[0] if pdf.ndim == 3 else paths.shape[0] if paths.ndim == 4 else 1
+
+        if pdf.ndim == 2:
+            pdf = np.broadcast_to(pdf, (n_replicas,) + pdf.shape)
+
+        if paths.ndim == 3:
+            paths = np.broadcast_to(paths, (n_replicas,) + paths.shape)
+
+        self.n_replicas = n_replicas
+        self.n_agents = paths.shape[1]
+        self.paths = paths
+        self.p_d = np.asarray(p_d, dtype=float)
+        self.fusion_range = fusion_range
+
+        # beliefs as unnormalized mass like Robot2D, mass / scale = probability
+        self.mass = np.repeat(pdf[:, np.newaxis], self.n_agents, axis=1)
+        self.total = self.mass.sum(axis=(2, 3))
+        self.scale = np.ones((n_replicas, self.n_agents))
+
+        self.i_gained = np.zeros((n_replicas, self.n_agents))
+        self.time_step = 0
+
+    def get_time_step(self):
+        return self.time_step
+
+    def get_positions(self):
+        """
+
+        :return: (N, agents, 2) positions at the current time step, agents past the end of their path stay put
+        """
+        k = min(self.time_step, self.paths.shape[2] - 1)
+        return self.paths[:, :, k]
+
+    def get_information_gained(self):
+        """
+
+        :return: (N, agents) information each agent has gained in each replica
+        """
+        return self.i_gained
+
+    def get_pdf(self):
+        """
+
+        :return: (N, agents, H, W) normalized beliefs
+        """
+        return self.mass / self.scale[..., np.newaxis, np.newaxis]
+
+    def step(self):
+        """
+        moves every agent in every replica to its next path position, then updates and fuses the beliefs
+        :return:
+        """
+        self.time_step += 1
+        self.update_information()
+
+        if self.fusion_range is not None:
+            self.fuse()
+
+    def run(self, steps):
+        for _ in range(0, steps):
+            self.step()
+
+        return self.get_information_gained()
+
+    def update_information(self):
+        """
+        Robot2D.update_information for every replica and agent at once. Cells off the grid hold no information,
+        negative indexes wrap like they do in Robot2D.
+        :return:
+        """
+        rows, cols = self.mass.shape[2:]
+        positions = self.get_positions()
+        x = np.trunc(positions[..., 0]).astype(int)
+        y = np.trunc(positions[..., 1]).astype(int)
+        on_grid = (x >= -cols) & (x < cols) & (y >= -rows) & (y < rows)
+
+        n, a = np.indices(x.shape)
+        n, a, y, x = n[on_grid], a[on_grid], y[on_grid] % rows, x[on_grid] % cols
+
+        mass_old = self.mass[n, a, y, x]
+        mass_new = mass_old*(1 - self.p_d[a])
+
+        self.i_gained[n, a] += (mass_old - mass_new) / self.scale[n, a]
+
+        self.mass[n, a, y, x] = mass_new
+        self.total[n, a] += mass_new - mass_old
+        self.scale[n, a] = self.total[n, a]     # normalize
+
+    def fuse(self):
+        """
+        min fusion like fusion.fuse_pdfs, each agent takes the cell by cell minimum of its belief and that of each
+        agent in range of it in turn, normalizing after each
+        :return:
+        """
+        positions = self.get_positions()
+        distance = np.linalg.norm(positions[:, :, np.newaxis] - positions[:, np.newaxis], axis=-1)
+        in_range = distance < self.fusion_range
+
+        pdf = self.get_pdf()
+        fused = pdf.copy()
+
+        for j in range(0, self.n_agents):
+            fuse_j = in_range[:, :, j] & (np.arange(self.n_agents) != j)
+            fused_j = np.minimum(fused, pdf[:, j, np.newaxis])
+            total_j = fused_j.sum(axis=(2, 3), keepdims=True)
+            fused_j = fused_j / np.where(total_j > 0, total_j, 1.0)
+            fused = np.where(fuse_j[..., np.newaxis, np.newaxis], fused_j, fused)
+
+        self.mass = fused
+        self.total = fused.sum(axis=(2, 3))
+        self.scale = np.where(self.total > 0, self.total, 1.0)
+
+
+def load_scenario(file_ws, n_agents, budget, cfg, base_folder=None):
+    """
+    builds the workspace and the dedicated agents once, the way single_simulation does, and pulls out the arrays a
+    LockStepSimulation needs
+
+    :param file_ws: string for the workspace parameters filename
+    :param n_agents: int [1, 3] for number of dedicated agents
+    :param budget: number of time steps
+    :param cfg: configuration module, ie config.config
+    :param base_folder: folder holding settings/, defaults to the repository root
+    :return: (H, W) prior, (agents, budget + 1, 2) paths, list of p_d and list of agent names
+    """
+    if base_folder is None:
+        base_folder = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    ws = init.load_workspace(file_ws, base_folder)
+    agents = init.load_agents(n_agents, cfg)
+
+    paths = []
+    for agent in agents:
+        n = cfg.get_cfg_number(agent.get_name())
+        waypoints = ws.get_default_waypoints(n)
+        agent.set_state(waypoints[0])
+        agent.start(ws)
+        agent.load_waypoints(waypoints, budget)
+
+        # the path is stored with the next node last
+        path = [agent.get_position()] + [node.get_position() for node in reversed(agent.get_path())]
+        path = path[:budget + 1] + [path[-1]]*(budget + 1 - len(path))
+        paths.append(path)
+
+    p_d = [agent.cfg.get("p_d") for agent in agents]
+    names = [agent.get_name() for agent in agents]
+
+    return ws.pdf.copy(), np.array(paths), p_d, names
+
+
+def build_priors(x_bounds, y_bounds, gaussians, dx=1, dy=1):
+    """
+    Workspace.generate_initial_distribution for a stack of replicas, ie to draw a different target prior for each
+
+    :param x_bounds: tuple of the min and max x value
+    :param y_bounds: tuple of the min and max y value
+    :param gaussians: (N, gaussians, 4) array of x mean, x variance, y mean and y variance
+    :param dx: grid size in the x direction
+    :param dy: grid size in the y direction
+    :return: (N, H, W) stack of normalized priors
+    """
+    gaussians = np.asarray(gaussians, dtype=float)
+    x_range = np.arange(x_bounds[0], x_bounds[1], dx)
+    y_range = np.arange(y_bounds[0], y_bounds[1], dy)
+
+    # (N, gaussians, W) and (N, gaussians, H) marginals, multiplied and summed over the gaussians
+    p_x = stats.norm.pdf(x_range, loc=gaussians[..., 0, np.newaxis], scale=gaussians[..., 1, np.newaxis])
+    p_y = stats.norm.pdf(y_range, loc=gaussians[..., 2, np.newaxis], scale=gaussians[..., 3, np.newaxis])
+    pdf = np.einsum("ngh,ngw->nhw", p_y, p_x)
+
+    return pdf / pdf.sum(axis=(1, 2), keepdims=True)
@@ -0,0 +1,408 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import csv
+import os
+import sqlite3
+from time import monotonic
+import numpy as np
+
+SQLITE_EXTENSIONS = (".sqlite", ".sqlite3", ".db")
+PARAMETER_TYPES = {"lambda": float, "budget": int, "t_limit": float, "gamma": float, "n_agents": int, "n_runs": int,
+                   "param_set": int, "n_limit": int}
+
+
+class ResultsWriter:
+    def __init__(self, file, buffer_size=64, flush_interval=5.0):
+        """
+        Append only sink for result rows. The file is opened once and rows are buffered, then written together once
+        buffer_size rows are waiting or flush_interval seconds have passed, so a crash loses at most that much. Files
+        ending in .sqlite, .sqlite3 or .db are written to a "results" table in SQLite, anything else is CSV. Only
+        this process should write the file, ie sweep workers hand their results back rather than writing them. SQLite
+        files can also be shared between processes, its locking keeps the writes whole. Rows with columns the file
+        doesn't have yet, ie results for more agents, widen it and earlier rows leave the new columns empty.
+        :param file: path of the results file, created with a header if it doesn't exist
+        :param buffer_size: rows held before writing
+        :param flush_interval: seconds a row can wait before writing
+        """
+        self.file = file
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.sqlite = os.path.splitext(file)[1].lower() in SQLITE_EXTENSIONS
+
+        self.buffer = []
+        self.t_flush = monotonic()
+        self.fieldnames = None      # column names, from the existing file or the first row
+        self.handle = None          # open CSV file or SQLite connection
+        self.writer = None
+
+        if self.sqlite:
+            self.handle = sqlite3.connect(file, timeout=30)
+            columns = self.handle.execute("PRAGMA table_info(results)").fetchall()
+            if columns:
+                self.fieldnames = [column[1] for column in columns]
+
+        else:
+            if os.path.isfile(file) and os.path.getsize(file):
+                with open(file, 'r', encoding='utf8', newline='') as fin:
+                    self.fieldnames = [x.strip() for x in next(csv.reader(fin))]
+
+            self.handle = open(file, 'a', encoding='utf8', newline='')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def write(self, row):
+        """
+
+        :param row: dictionary of one result, the first row written to a new file sets the columns
+        :return:
+        """
+        self.buffer.append(row)
+
+        if len(self.buffer) >= self.buffer_size or monotonic() - self.t_flush >= self.flush_interval:
+            self.flush()
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.write(row)
+
+    def flush(self):
+        self.t_flush = monotonic()
+
+        if not self.buffer or self.handle is None:
+            return
+
+        fieldnames = self.fieldnames or []
+        new_fields = []
+
+        for row in self.buffer:
+            new_fields.extend(x for x in row if x not in fieldnames and x not in new_fields)
+
+        if self.fieldnames is None:
+            self.start(new_fields)
+
+        elif new_fields:
+            self.widen(new_fields)
+
+        if self.sqlite:
+            columns = ", ".join('"{}"'.format(x) for x in self.fieldnames)
+            values = ", ".join("?" for _ in self.fieldnames)
+            rows = [[to_python(row.get(x)) for x in self.fieldnames] for row in self.buffer]
+
+            with self.handle:
+                self.handle.executemany("INSERT INTO results ({}) VALUES ({})".format(columns, values), rows)
+
+        else:
+            self.get_writer().writerows(self.buffer)
+            self.handle.flush()
+
+        self.buffer = []
+
+    def start(self, fieldnames):
+        """
+        creates the header or table of a new file
+        :param fieldnames: list of column names
+        :return:
+        """
+        self.fieldnames = fieldnames
+
+        if self.sqlite:
+            columns = ", ".join('"{}"'.format(x) for x in fieldnames)
+
+            with self.handle:
+                self.handle.execute("CREATE TABLE IF NOT EXISTS results ({})".format(columns))
+
+        else:
+            self.get_writer().writeheader()
+
+    def widen(self, new_fields):
+        """
+        adds columns to an existing file, rows already written leave them empty. A CSV file is rewritten with the
+        wider header.
+        :param new_fields: list of column names the file doesn't have
+        :return:
+        """
+        self.fieldnames = self.fieldnames + new_fields
+
+        if self.sqlite:
+            with self.handle:
+                for field in new_fields:
+                    self.handle.execute('ALTER TABLE results ADD COLUMN "{}"'.format(field))
+
+            return
+
+        self.handle.close()
+
+        with open(self.file, 'r', encoding='utf8', newline='') as fin:
+            rows = list(csv.reader(fin))
+
+        file_tmp = self.file + ".tmp"
+        with open(file_tmp, 'w', encoding='utf8', newline='') as fout:
+            writer = csv.writer(fout, delimiter=',')
+            writer.writerow(self.fieldnames)
+            writer.writerows(row + [""]*(len(self.fieldnames) - len(row)) for row in rows[1:] if row)
+
+        os.replace(file_tmp, self.file)
+        self.handle = open(self.file, 'a', encoding='utf8', newline='')
+        self.writer = None
+
+    def get_writer(self):
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.handle, fieldnames=self.fieldnames, delimiter=',')
+
+        return self.writer
+
+    def close(self):
+        if self.handle is None:
+            return
+
+        self.flush()
+        self.handle.close()
+        self.handle = None
+
+
+class ParameterSets:
+    def __init__(self, file):
+        """
+        Index of the parameter sets in a parameter sets file, read once so every parameter set is identified with a
+        dictionary lookup instead of rescanning the file. New parameter sets are appended to the file.
+        :param file: path of the parameter sets file, created if it doesn't exist
+        """
+        self.file = file
+        self.index = {}         # parameter key: param_set
+        self.next_id = 1
+
+        if os.path.isfile(file):
+            with open(file, 'r', encoding='utf8') as fin:
+                reader = csv.DictReader(fin, skipinitialspace=True)
+
+                for row in reader:
+                    convert_types(row)
+                    self.index.update({self.get_key(row): row.get("param_set")})
+                    self.next_id = max(self.next_id, row.get("param_set") + 1)
+
+        self.writer = ResultsWriter(file, buffer_size=1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def __len__(self):
+        return len(self.index)
+
+    @staticmethod
+    def get_key(params):
+        """
+        parameter sets match when every value other than the number of runs matches, empty values are the same as
+        leaving the column out, ie rows written before the file was widened
+        :param params: parameter dictionary
+        :return: hashable key of the parameter values
+        """
+        return tuple(sorted((key, val) for key, val in params.items()
+                            if key not in ("n_runs", "param_set") and val not in (None, "")))
+
+    def identify(self, params):
+        """
+        finds the id of the parameter set, adding it to the file if it's new. Sets "param_set" in params.
+        :param params: parameter dictionary, see load_parameter_file
+        :return: param_set id, True if the parameter set is new
+        """
+        key = self.get_key(params)
+        param_id = self.index.get(key)
+        new_param = param_id is None
+
+        if new_param:
+            param_id = self.next_id
+            self.next_id += 1
+            self.index.update({key: param_id})
+
+        params.update({"param_set": param_id})
+
+        if new_param:
+            self.writer.write(params)
+
+        return param_id, new_param
+
+    def close(self):
+        self.writer.close()
+
+
+class ResultsTable:
+    def __init__(self, results_file, params_file):
+        """
+        Results and parameter sets loaded once into numpy columns, with the results grouped by parameter set so any
+        column can be summarized per parameter set without rereading the files. Use load_results() to reuse tables
+        that are already loaded.
+        :param results_file: path of the results file, CSV or SQLite, see ResultsWriter
+        :param params_file: path of the parameter sets file
+        """
+        self.columns = read_columns(results_file)
+        self.params = []        # parameter dictionaries in the order of the parameter sets file
+
+        with open(params_file, 'r', encoding='utf8') as fin:
+            reader = csv.DictReader(fin, skipinitialspace=True)
+
+            for row in reader:
+                self.params.append(convert_types(row))
+
+        # results sorted by parameter set, group i is rows starts[i]:ends[i] of the sorted columns
+        param_set = self.columns.get("param_set", np.zeros(0)).astype(int)
+        self.order = np.argsort(param_set, kind="stable")
+        ids = [x.get("param_set") for x in self.params]
+        self.starts = np.searchsorted(param_set[self.order], ids, side="left")
+        self.ends = np.searchsorted(param_set[self.order], ids, side="right")
+
+    def __len__(self):
+        return len(self.params)
+
+    def get_parameter(self, key):
+        """
+
+        :param key: parameter name, ie "lambda"
+        :return: array of the parameter's value for each parameter set
+        """
+        return np.array([x.get(key) for x in self.params])
+
+    def get_column(self, key):
+        return self.columns[key]
+
+    def get_counts(self):
+        return self.ends - self.starts
+
+    def get_groups(self, key):
+        """
+
+        :param key: results column, ie "I_Gained"
+        :return: list with an array of the column's values for each parameter set
+        """
+        column = self.columns[key][self.order]
+        return [column[a:b] for a, b in zip(self.starts, self.ends)]
+
+    def get_stats(self, key, quantiles=(0.25, 0.5, 0.75)):
+        """
+
+        :param key: results column, ie "I_Gained"
+        :param quantiles: quantiles to compute
+        :return: dictionary of arrays over the parameter sets, "count", "mean", "std", "min", "max" and "quantiles" with
+        a row per parameter set and a column per quantile. Parameter sets without results are nan.
+        """
+        n = len(self.params)
+        stats = {"count": self.get_counts(), "mean": np.full(n, np.nan), "std": np.full(n, np.nan),
+                 "min": np.full(n, np.nan), "max": np.full(n, np.nan),
+                 "quantiles": np.full((n, len(quantiles)), np.nan)}
+
+        for i, values in enumerate(self.get_groups(key)):
+            if not values.size:
+                continue
+
+            stats["mean"][i] = np.mean(values)
+            stats["std"][i] = np.std(values)
+            stats["min"][i] = np.min(values)
+            stats["max"][i] = np.max(values)
+            stats["quantiles"][i] = np.quantile(values, quantiles)
+
+        return stats
+
+    def get_box_stats(self, key, whisker=1.5):
+        """
+        box plot statistics for each parameter set, in the form matplotlib's Axes.bxp takes
+        :param key: results column, ie "I_Gained"
+        :param whisker: whisker reach as a multiple of the interquartile range
+        :return: list of dictionaries with "med", "q1", "q3", "whislo", "whishi", "mean" and "fliers"
+        """
+        box_stats = []
+
+        for values in self.get_groups(key):
+            if not values.size:
+                box_stats.append({"med": np.nan, "q1": np.nan, "q3": np.nan, "whislo": np.nan, "whishi": np.nan,
+                                  "mean": np.nan, "fliers": values})
+                continue
+
+            q1, med, q3 = np.quantile(values, (0.25, 0.5, 0.75))
+            reach = whisker*(q3 - q1)
+            inside = values[(values >= q1 - reach) & (values <= q3 + reach)]
+
+            box_stats.append({"med": med, "q1": q1, "q3": q3, "whislo": np.min(inside), "whishi": np.max(inside),
+                              "mean": np.mean(values), "fliers": values[(values < q1 - reach) | (values > q3 + reach)]})
+
+        return box_stats
+
+
+_tables = {}    # (results path, params path): (modification times, ResultsTable)
+
+
+def load_results(results_file, params_file):
+    """
+    loads the results and parameter sets files into a ResultsTable, reusing the last table loaded from the same files
+    unless either has been modified since
+    :param results_file: path of the results file
+    :param params_file: path of the parameter sets file
+    :return: ResultsTable
+    """
+    key = (os.path.abspath(results_file), os.path.abspath(params_file))
+    stamp = tuple((os.stat(x).st_mtime_ns, os.stat(x).st_size) for x in key)
+
+    cached = _tables.get(key)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    table = ResultsTable(results_file, params_file)
+    _tables.update({key: (stamp, table)})
+    return table
+
+
+def read_columns(file):
+    """
+
+    :param file: path of a results file, CSV or SQLite
+    :return: dictionary of column name: array, numeric columns are floats with empty cells as nan
+    """
+    if os.path.splitext(file)[1].lower() in SQLITE_EXTENSIONS:
+        connection = sqlite3.connect(file)
+        cursor = connection.execute("SELECT * FROM results")
+        names = [x[0] for x in cursor.description]
+        rows = cursor.fetchall()
+        connection.close()
+
+    else:
+        with open(file, 'r', encoding='utf8', newline='') as fin:
+            reader = csv.reader(fin, skipinitialspace=True)
+            names = [x.strip() for x in next(reader, [])]
+            rows = [row for row in reader if row]
+
+    values = list(zip(*rows)) if rows else [()]*len(names)
+    columns = {}
+
+    for name, column in zip(names, values):
+        try:
+            columns.update({name: np.array([np.nan if x in ("", None) else x for x in column], dtype=float)})
+        except (TypeError, ValueError):
+            columns.update({name: np.array(column)})
+
+    return columns
+
+
+def convert_types(row):
+    """
+    converts the known parameter columns of a row read from a CSV file in place
+    :param row: dictionary of strings
+    :return: the row
+    """
+    for key, f in PARAMETER_TYPES.items():
+        if row.get(key) not in (None, ""):
+            row.update({key: f(row.get(key))})
+
+    return row
+
+
+def to_python(value):
+    if isinstance(value, np.generic):
+        return value.item()
+
+    return value
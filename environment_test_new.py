@@ -6,6 +6,7 @@ import os
 import matplotlib.pyplot as plt
 from config import config
 from dynopy.motion_planning.RIG_tree_R_based import RIG_tree
+from dynopy.motion_planning.tree_analysis import plot_tree
 import dynopy.tools.initialize as init
 
 cfg_ws = config.get_parameters()
@@ -44,14 +45,12 @@ def run(file_ws, lamb, budget, t_limit, gamma, n_agents, plot=True, plot_full=Fa
             if agent.name != "Blinky":
                 agent.step()
             else:
-                V, E, V_closed = RIG_tree(agent.V, agent.E, agent.get_X_free(), agent.get_X_free(),
-                                          agent.get_pdf(), agent.get_state(), agent.cfg, agent.sample_dynamics,
-                                          agent.channel_list)
-                agent.V = V
-                agent.E = E
-                agent.V_closed = V_closed
-
-                agent.plot_tree(agent.E, 'blue')
+                agent.fusion_index.update(agent.channel_list)
+                agent.tree = RIG_tree(agent.tree, agent.get_X_free(), agent.get_X_free(), agent.get_pdf(),
+                                      agent.get_state(), agent.cfg, agent.sample_dynamics_batch, agent.fusion_index,
+                                      agent.get_rng())
+
+                plot_tree(agent.get_edges(), 'blue')
 
         ws.time_step += 1
 
@@ -1,13 +1,15 @@
 # !/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import csv
 import os
 import sys
 import matplotlib as mpl
 # mpl.use('agg')
 import matplotlib.pyplot as plt
-from dynopy.tools.initialize import load_parameter_file, write_results_to_file
+from dynopy.motion_planning.planning_limit import PlanningLimit
+from dynopy.tools.initialize import load_parameter_file
+from dynopy.tools.results import load_results
+import benchmark
 import single_simulation
 
 
@@ -52,6 +54,32 @@ def get_user_input():
     return cmd
 
 
+def get_limit_input():
+    """
+    asks how the volunteer's planning is limited each step, see PlanningLimit
+    :return: limit type and expansions or nodes per step, None for either keeps the parameter file or configuration
+    """
+    limit_type = input(' Planning limit, cpu, wall, expansions or nodes [default]: ').strip().lower() or None
+    n_limit = None
+
+    if limit_type is not None and limit_type not in PlanningLimit.TYPES:
+        print(' ERROR: planning limit not understood, using the default')
+        limit_type = None
+
+    if PlanningLimit.TYPES.get(limit_type) == "n_limit":
+        cmd = input(' {} per step [default]: '.format(limit_type.capitalize())).strip()
+
+        if cmd:
+            try:
+                n_limit = int(cmd)
+            except ValueError:
+                print(' ERROR: {} per step must be a whole number, using the default'.format(limit_type))
+
+    print()
+
+    return limit_type, n_limit
+
+
 def interpret_command(cmd, simulation_type):
 
     if simulation_type == 'single':
@@ -111,6 +139,8 @@ def interpret_single_sim_cmd(cmd):
             working = False
 
     if working:
+        limit_type, n_limit = get_limit_input()
+
         results = single_simulation.run(filename_ws,
                                         params.get("lambda"),
                                         params.get("budget"),
@@ -119,7 +149,9 @@ def interpret_single_sim_cmd(cmd):
                                         params.get("n_agents"),
                                         irrt,
                                         True,
-                                        False)
+                                        False,
+                                        limit_type=limit_type or params.get("limit_type"),
+                                        n_limit=n_limit or params.get("n_limit"))
 
         for key, val in results.items():
             print(" {}:\t{}".format(key, val))
@@ -243,36 +275,10 @@ def interpret_benchmark_sim_cmd(cmd):
         results_file = os.path.join(os.path.dirname(__file__), 'results', results_filename)
         params_file = os.path.join(os.path.dirname(__file__), 'results', params_filename)
 
-        n_params = len(params_list)
-        p_run = 0
+        limit_type, n_limit = get_limit_input()
+        benchmark.set_planning_limit(params_list, limit_type, n_limit)
 
-        for params in params_list:
-            p_run += 1
-            p, new_param = identify_params(params, params_file)
-
-            params.update({"param_set": p})
-            runs = params.get("n_runs")
-
-            if new_param:
-                write_results_to_file(params_file, [params])
-
-            for r in range(0, runs):
-
-                print(" Parameter Set: {} of {}\t\tRun: {} of {} ".format(p_run, n_params, r + 1, runs), end='\r')
-                results = single_simulation.run(
-                    filename_ws,
-                    params.get("lambda"),
-                    params.get("budget"),
-                    params.get("t_limit"),
-                    params.get("gamma"),
-                    params.get("n_agents"),
-                    irrt,
-                    True,
-                    False,
-                )
-
-                results.update({"param_set": p, "run": r})
-                write_results_to_file(results_file, [results])
+        benchmark.run_benchmark(filename_ws, params_list, irrt, results_file, params_file)
 
         x, y = get_results("lambda", "I_Gained", params_file, results_file)
 
@@ -316,100 +322,30 @@ def print_results(results_list, params_list, variable):
     input("Continue?")
 
 
-# noinspection PyTypeChecker
-def identify_params(params, file):
-
-    param_id = None
-    param_id_max = 0        # assigns 0 unless a param set is found
-    new_param = False
-
-    if not os.path.isfile(file):
-        # file doesn't exist, so neither does a parameter set
-        param_id = 1
-        new_param = True
-
-    else:
-        with open(file, 'r', encoding='utf8') as fin:
-            reader = csv.DictReader(fin, skipinitialspace=True)
-
-            for row in reader:
-                # see if parameter is in results set already
-                row.update({
-                    "lambda": float(row.get("lambda")),
-                    "budget": int(row.get("budget")),
-                    "t_limit": float(row.get("t_limit")),
-                    "gamma": float(row.get("gamma")),
-                    "n_agents": int(row.get("n_agents")),
-                    "n_runs": int(params.get("n_runs")),    # doesn't need to be identical
-                    "param_set": int(row.get("param_set"))
-                })
-
-                param_id_row = int(row.get("param_set"))
-                params.update({"param_set": param_id_row})
-
-                if params == row:
-                    # param set found
-                    param_id = param_id_row
-                    break
-
-                elif param_id_row > param_id_max:
-                    # param set not found
-                    param_id_max = param_id_row
-
-    if not param_id:
-        param_id = param_id_max + 1
-        new_param = True
-
-    return param_id, new_param
-
-
-# noinspection PyTypeChecker
 def get_results(x_key, y_key, x_file, y_file):
-    x_list = []
-    y_list = []
-
-    with open(x_file, 'r', encoding='utf8') as fin_x:
-        reader_x = csv.DictReader(fin_x, skipinitialspace=True)
-
-        for row_x in reader_x:
-            x_list.append(float(row_x.get(x_key)))
-            param_set = row_x.get("param_set")
-
-            y_vals = []
-            with open(y_file, 'r', encoding='utf8') as fin_y:
-                reader_y = csv.DictReader(fin_y, skipinitialspace=True)
+    """
 
-                for row_y in reader_y:
-                    if row_y.get("param_set") == param_set:
-                        y_vals.append(float(row_y.get(y_key)))
-
-                y_list.append(sum(y_vals)/len(y_vals))
-
-    return x_list, y_list
+    :param x_key: parameter name
+    :param y_key: results column
+    :param x_file: parameter sets file
+    :param y_file: results file
+    :return: list of the parameter for each parameter set, list of the mean of the results column for each set
+    """
+    table = load_results(y_file, x_file)
+    return table.get_parameter(x_key).tolist(), table.get_stats(y_key).get("mean").tolist()
 
 
 def get_results_full(x_key, y_key, x_file, y_file):
-    x_list = []
-    y_list = []
-
-    with open(x_file, 'r', encoding='utf8') as fin_x:
-        reader_x = csv.DictReader(fin_x, skipinitialspace=True)
-
-        for row_x in reader_x:
-            x_list.append(float(row_x.get(x_key)))
-            param_set = row_x.get("param_set")
-
-            y_vals = []
-            with open(y_file, 'r', encoding='utf8') as fin_y:
-                reader_y = csv.DictReader(fin_y, skipinitialspace=True)
-
-                for row_y in reader_y:
-                    if row_y.get("param_set") == param_set:
-                        y_vals.append(float(row_y.get(y_key)))
-
-                y_list.append(y_vals)
-
-    return x_list, y_list
+    """
+
+    :param x_key: parameter name
+    :param y_key: results column
+    :param x_file: parameter sets file
+    :param y_file: results file
+    :return: list of the parameter for each parameter set, list of lists of the results column for each set
+    """
+    table = load_results(y_file, x_file)
+    return table.get_parameter(x_key).tolist(), [x.tolist() for x in table.get_groups(y_key)]
 
 
 def plot_comparison(results_filename, params_filename, x_key, y_keys):
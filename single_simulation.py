@@ -3,6 +3,7 @@
 
 import os
 import matplotlib.pyplot as plt
+import numpy as np
 from config import config
 import dynopy.tools.initialize as init
 
@@ -16,7 +17,8 @@ def main():
     run('workspace_sandbox.txt', 0.99, 80, 0.1, .9, 3)
 
 
-def run(file_ws, lamb, budget, t_limit, gamma, n_agents, irrt=False, plot=True, plot_full=False):
+def run(file_ws, lamb, budget, t_limit, gamma, n_agents, irrt=False, plot=True, plot_full=False, seed=None,
+        limit_type=None, n_limit=None):
     """
 
     :param file_ws: string for the workspace parameters filename
@@ -28,16 +30,29 @@ def run(file_ws, lamb, budget, t_limit, gamma, n_agents, irrt=False, plot=True,
     :param irrt: run volunteer with IRRT algorithm
     :param plot: boolean for whether or not to show the plot at the end
     :param plot_full: boolean for whether or not to show each step
+    :param seed: int or SeedSequence the agents' random streams are spawned from, None for a fresh seed
+    :param limit_type: how the volunteer's planning is limited each step, "cpu", "wall", "expansions" or "nodes". None
+    keeps the configured type. Only the count based types give the same results for the same seed
+    :param n_limit: int > 0 for the expansions or nodes per step of the count based limit types, None keeps the
+    configured number
     :return: dictionary of final results
     """
     ws = init.load_workspace(file_ws, os.path.dirname(__file__))
-    volunteer = init.load_volunteer(config, lamb, budget, t_limit, gamma, irrt, plot_full)
+    volunteer = init.load_volunteer(config, lamb, budget, t_limit, gamma, irrt, plot_full, limit_type=limit_type,
+                                    n_limit=n_limit)
 
     agents_dedicated = init.load_agents(n_agents, config)
 
     agents_all = agents_dedicated.copy()
     agents_all.append(volunteer)
 
+    # every agent gets its own independent stream from the one simulation seed
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+
+    for agent, seed_agent in zip(agents_all, seed.spawn(len(agents_all))):
+        agent.set_rng(seed_agent)
+
     # load waypoints for all agents based on defaults set in the workspace
     for agent in agents_all:
         n = config.get_cfg_number(agent.get_name())
@@ -72,8 +87,9 @@ def run(file_ws, lamb, budget, t_limit, gamma, n_agents, irrt=False, plot=True,
     if plot and not plot_full:      # keeps simulation from overwriting benchmarking output
         print()
 
-    volunteer.plot_pdf()
-    ws.plot()
+    if plot:
+        volunteer.plot_pdf()
+        ws.plot()
 
     # TODO: could put this in volunteer and keep track of every step
     I_Data = {"I_Gained": volunteer.get_information_gained()}